@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Generic, List
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Tuple
+import math
+import time
 from problem import HeuristicFunction, Problem, S, A, Solution
 
 # This is an abstract class for all goal based agents
@@ -46,12 +50,16 @@ class UninformedSearchAgent(GoalBasedAgent[S, A]):
 
 # This agent applies an informed search algorithm to find the solution to goal for the given state
 class InformedSearchAgent(GoalBasedAgent[S, A]):
-    def __init__(self, search_fn: Callable[[Problem[S, A], S, HeuristicFunction], Solution], heuristic: HeuristicFunction) -> None:
+    def __init__(self, search_fn: Callable[[Problem[S, A], S, HeuristicFunction], Solution], heuristic: HeuristicFunction,
+                 cache_failures: bool = True) -> None:
         super().__init__()
         self.search_fn = search_fn
         self.heuristic = heuristic
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
+        # If False, a state without a solution is not stored in the policy so the next observation searches again
+        # (for searches that may fail only because they ran out of time, e.g. "anytime_search.AnytimeSearch")
+        self.cache_failures = cache_failures
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
@@ -59,11 +67,193 @@ class InformedSearchAgent(GoalBasedAgent[S, A]):
             solution = self.search_fn(problem, state, self.heuristic)
             # if no solution was found, we return None
             if solution is None:
-                self.policy[state] = None
+                if self.cache_failures: self.policy[state] = None
                 return None
             # Otherwise, we go through the solution path and store the action to do in each state into the policy
             current = state
             for action in solution:
                 self.policy[current] = action
                 current = problem.get_successor(current, action)
-        return self.policy.get(state)
\ No newline at end of file
+        return self.policy.get(state)
+
+# This agent follows an exact cost-to-go function (e.g. cost_to_go.cost_to_go_heuristic) instead of searching
+# In every state, it picks the action that minimizes the action cost plus the cost to go from the successor,
+# so every step only looks at the actions of the current state (no search and no policy to store).
+class CostToGoAgent(GoalBasedAgent[S, A]):
+    def __init__(self, cost_to_go: HeuristicFunction) -> None:
+        super().__init__()
+        self.cost_to_go = cost_to_go
+
+    def act(self, problem: Problem[S, A], state: S) -> A:
+        # If the goal cannot be reached from this state, we return None
+        if self.cost_to_go(problem, state) == math.inf:
+            return None
+        best_action, best_cost = None, math.inf
+        for action in problem.get_actions(state):
+            cost = problem.get_cost(state, action) + self.cost_to_go(problem, problem.get_successor(state, action))
+            if cost < best_cost:
+                best_action, best_cost = action, cost
+        return best_action
+
+# The aggregate statistics of a batch of queries
+@dataclass
+class BatchStats:
+    queries: int = 0        # The number of queries in the batch
+    searches: int = 0       # The number of queries that needed a search
+    reused: int = 0         # The number of queries answered from the policy built by the previous queries
+    unsolved: int = 0       # The number of queries without a solution
+    total_cost: float = 0   # The sum of the path costs of the solved queries
+    elapsed: float = 0      # The wall time of the batch in seconds
+
+# The result of a batch of queries: the solution and the path cost of every query (in the same order as the queries) and the statistics
+@dataclass
+class BatchResult:
+    solutions: List[Solution] = field(default_factory=list)
+    costs: List[float] = field(default_factory=list)
+    stats: BatchStats = field(default_factory=BatchStats)
+
+# Follow the policy from the given state and return the solution (or None if the policy does not know the state)
+# The policy only contains states on previous solution paths, so following it always ends at a goal
+def _follow_policy(problem: Problem[S, A], policy: Dict[S, A], state: S) -> Tuple[bool, Solution]:
+    if state not in policy: return False, None
+    if policy[state] is None: return True, None
+    solution = []
+    while state in policy:
+        action = policy[state]
+        solution.append(action)
+        state = problem.get_successor(state, action)
+    return True, solution
+
+# Store the actions of a solution into the policy
+def _store_solution(problem: Problem[S, A], policy: Dict[S, A], state: S, solution: Solution) -> None:
+    if solution is None:
+        policy[state] = None
+        return
+    for action in solution:
+        policy[state] = action
+        state = problem.get_successor(state, action)
+
+# The state of every worker process of a batch: the problem, the search function, the heuristic and the policy of every goal
+_batch_worker: Dict[str, Any] = {}
+
+def _init_batch_worker(problem: Problem, search_fn: Callable, heuristic: Optional[HeuristicFunction]) -> None:
+    _batch_worker.update(problem=problem, search_fn=search_fn, heuristic=heuristic, problems={}, policies={})
+
+# Solve one query in a worker process. The query is a (goal, state) pair where the goal is None for the problem's own goal
+def _solve_batch_query(query: Tuple[Any, Any]) -> Tuple[bool, Solution]:
+    goal, state = query
+    problems, policies = _batch_worker["problems"], _batch_worker["policies"]
+    if goal not in problems:
+        problems[goal] = _batch_worker["problem"] if goal is None else _batch_worker["problem"].with_goal(goal)
+        policies[goal] = {}
+    problem, policy = problems[goal], policies[goal]
+    found, solution = _follow_policy(problem, policy, state)
+    if found: return False, solution
+    search_fn, heuristic = _batch_worker["search_fn"], _batch_worker["heuristic"]
+    solution = search_fn(problem, state) if heuristic is None else search_fn(problem, state, heuristic)
+    _store_solution(problem, policy, state, solution)
+    return True, solution
+
+# This agent solves batches of queries on the same problem (many start states or many goals)
+# All the queries share the problem cache (heuristic tables, distance oracles, etc.) so the setup cost is only paid once.
+# The solutions are stored in a policy (per goal), so a query that starts on the solution path of a previous query
+# is answered by following the policy without searching (the rest of an optimal path is also optimal).
+# If "workers" is positive, the searches are distributed over a pool of processes. Every worker receives the problem once
+# (including its cache) so the problem, the search function and the heuristic must be picklable (defined at the top level of a module).
+# It can also be used as a normal agent (the search function is informed if a heuristic is given and uninformed otherwise).
+# Note: the costs found by the previous queries are not reused as bounds to prune the next searches. The exact costs are only known
+# for the states on the stored paths, and mixing them with the heuristic on the other states can make it inconsistent, so the searches
+# (which never reopen explored states) could return suboptimal paths. Sound bounds (as in Adaptive A*) would need the g values of
+# every state explored by the search, which the search functions do not return. The solved paths are reused through the policies instead.
+class BatchSearchAgent(GoalBasedAgent[S, A]):
+    def __init__(self, search_fn: Callable[..., Solution], heuristic: Optional[HeuristicFunction] = None, workers: int = 0) -> None:
+        super().__init__()
+        self.search_fn = search_fn
+        self.heuristic = heuristic
+        self.workers = workers
+        # The policy of every problem (the problems created for the goals are also stored to reuse their policies)
+        self.policies: Dict[Problem, Dict[S, A]] = {}
+        self.goal_problems: Dict[Tuple[Problem, Any], Problem] = {}
+
+    def act(self, problem: Problem[S, A], state: S) -> A:
+        solution = self.solve(problem, [state]).solutions[0]
+        return solution[0] if solution else None
+
+    # Solve the problem from every given start state
+    def solve(self, problem: Problem[S, A], states: Iterable[S]) -> BatchResult:
+        return self._solve(problem, [(None, state) for state in states])
+
+    # Solve the problem from its initial state (or the given start state) to every given goal
+    # The problem must implement "with_goal(goal)" which returns a copy of the problem with another goal sharing the same cache
+    # (it is checked here, since the worker processes would only fail on their first query)
+    def solve_goals(self, problem: Problem[S, A], goals: Iterable[Any], state: Optional[S] = None) -> BatchResult:
+        if not callable(getattr(problem, "with_goal", None)):
+            raise ValueError(f"{type(problem).__name__} does not implement with_goal, so it cannot be solved for other goals (use solve for many start states)")
+        if state is None: state = problem.get_initial_state()
+        return self._solve(problem, [(goal, state) for goal in goals])
+
+    def _problem(self, problem: Problem[S, A], goal: Any) -> Problem[S, A]:
+        if goal is None: return problem
+        key = (problem, goal)
+        if key not in self.goal_problems:
+            self.goal_problems[key] = problem.with_goal(goal)
+        return self.goal_problems[key]
+
+    def _solve(self, problem: Problem[S, A], queries: List[Tuple[Any, S]]) -> BatchResult:
+        start = time.perf_counter()
+        result = BatchResult()
+        result.stats.queries = len(queries)
+        # First, answer the queries that are already known from the policies (or repeated in the batch)
+        answers: Dict[Tuple[Any, S], Solution] = {}
+        pending: List[Tuple[Any, S]] = []
+        for query in queries:
+            if query in answers:
+                result.stats.reused += 1
+                continue
+            goal, state = query
+            query_problem = self._problem(problem, goal)
+            found, answers[query] = _follow_policy(query_problem, self.policies.setdefault(query_problem, {}), state)
+            if found:
+                result.stats.reused += 1
+            else:
+                pending.append(query)
+        # Then search for the rest, either in the process pool or in this process
+        # (one after the other, so every search can reuse the solutions of the previous ones)
+        pooled = self.workers > 0 and len(pending) > 1
+        if pooled:
+            with ProcessPoolExecutor(self.workers, initializer=_init_batch_worker, initargs=(problem, self.search_fn, self.heuristic)) as executor:
+                chunksize = max(1, len(pending) // (4 * self.workers))
+                outcomes = list(executor.map(_solve_batch_query, pending, chunksize=chunksize))
+        else:
+            outcomes = []
+            for goal, state in pending:
+                query_problem = self._problem(problem, goal)
+                found, solution = _follow_policy(query_problem, self.policies[query_problem], state)
+                if not found:
+                    solution = self.search_fn(query_problem, state) if self.heuristic is None else self.search_fn(query_problem, state, self.heuristic)
+                    _store_solution(query_problem, self.policies[query_problem], state, solution)
+                outcomes.append((not found, solution))
+        for (goal, state), (searched, solution) in zip(pending, outcomes):
+            if pooled:
+                query_problem = self._problem(problem, goal)
+                _store_solution(query_problem, self.policies[query_problem], state, solution)
+            answers[(goal, state)] = solution
+            result.stats.searches += searched
+            result.stats.reused += not searched
+        # Finally, collect the solutions of all the queries (including the duplicates) and compute the path costs
+        for goal, state in queries:
+            query_problem = self._problem(problem, goal)
+            solution = answers[(goal, state)]
+            if solution is None:
+                result.stats.unsolved += 1
+                cost = float("inf")
+            else:
+                cost = 0
+                for action in solution:
+                    cost += query_problem.get_cost(state, action)
+                    state = query_problem.get_successor(state, action)
+                result.stats.total_cost += cost
+            result.solutions.append(solution)
+            result.costs.append(cost)
+        result.stats.elapsed = time.perf_counter() - start
+        return result
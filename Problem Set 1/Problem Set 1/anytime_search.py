@@ -0,0 +1,112 @@
+from typing import Dict, Iterator, Optional, Sequence, Set, Tuple
+import math
+import time
+
+from frontier import PriorityFrontier
+from problem import HeuristicFunction, Problem, S, A, Solution
+from search_nodes import SearchNodes
+from search_stats import SearchStats
+
+# The weights used by the anytime search: the first solution is found quickly with a large weight, then every
+# iteration lowers the weight to improve the solution until the last one (1) which gives an optimal solution
+DEFAULT_WEIGHTS = (5.0, 3.0, 2.0, 1.5, 1.25, 1.0)
+# The number of expansions between two checks of the deadline
+DEADLINE_CHECK_INTERVAL = 64
+
+# Anytime Repairing A* (ARA*) runs a series of weighted A* searches (priority f = g + w * h) with decreasing weights.
+# With a consistent heuristic, every solution costs at most w times the optimal cost.
+# Instead of starting from scratch, every iteration reuses the g values of the previous ones:
+#   - a state is expanded at most once per iteration (so the weighted search stays fast),
+#   - the states whose g value decreased after they were expanded in the current iteration are kept in an "inconsistent" set
+#     and they are moved back to the frontier at the start of the next iteration (with the priorities of the new weight).
+# An iteration stops once the best goal found costs no more than the lowest priority in the frontier.
+# After every iteration, it yields the best solution so far, its cost and a bound on its suboptimality (if any of them improved):
+#   min(w, cost / min over the frontier and the inconsistent states of (g + h)) (the optimal cost is at least the denominator)
+# The cost of the best goal is updated as soon as a cheaper path to it is generated (the g(goal) rule of ARA*), even if the
+# goal is not popped again, and the node of the path is kept with the cost so the yielded path always has the yielded cost.
+# The search ends when the bound reaches 1 (the solution is optimal), when the weights are exhausted
+# or when the deadline (a time.perf_counter() value) passes. At the deadline, the current iteration is abandoned
+# (its solution is not better than the last one that was yielded).
+def AnytimeRepairingAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                                weights: Sequence[float] = DEFAULT_WEIGHTS, deadline: Optional[float] = None,
+                                stats: Optional[SearchStats] = None) -> Iterator[Tuple[Solution, float, float]]:
+    if stats is not None: heuristic = stats.begin(heuristic)
+    try:
+        nodes = SearchNodes()
+        index: Dict[S, int] = {initial_state: nodes.add_root()}     # The node of the best path found to every state
+        h_values: Dict[S, float] = {initial_state: heuristic(problem, initial_state)}
+        frontier = PriorityFrontier()
+        inconsistent: Set[S] = set()
+        goal = None                                                  # The goal state with the cheapest path found so far
+        goal_cost = math.inf
+        goal_index = -1                                              # The node of the cheapest path to the goal
+        frontier.push(initial_state, weights[0] * h_values[initial_state])
+        expansions = 0
+        last = None                                                  # The cost and bound of the last yielded solution
+        for iteration, weight in enumerate(weights):
+            if iteration > 0:
+                # Move the inconsistent states to the frontier and reorder it using the new weight
+                states = [state for state in index if state in frontier or state in inconsistent]
+                frontier = PriorityFrontier()
+                for state in states:
+                    frontier.push(state, nodes.cost(index[state]) + weight * h_values[state])
+                inconsistent = set()
+            closed: Set[S] = set()
+            while frontier and goal_cost > frontier.min_priority():
+                if deadline is not None and expansions % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                    return
+                state, _, _ = frontier.pop()
+                closed.add(state)
+                cost = nodes.cost(index[state])
+                # A goal is not expanded: it is the end of a solution
+                if problem.is_goal(state):
+                    if cost < goal_cost: goal, goal_cost, goal_index = state, cost, index[state]
+                    continue
+                expansions += 1
+                if stats is not None: stats.expand(len(frontier) + 1, len(closed))
+                for action, child, action_cost in problem.expand(state):
+                    child_cost = cost + action_cost
+                    if stats is not None: stats.generated += 1
+                    child_index = index.get(child)
+                    if child_index is not None and child_cost >= nodes.cost(child_index):
+                        if stats is not None: stats.duplicates += 1
+                        continue
+                    if child_index is not None and stats is not None: stats.reopened += 1
+                    index[child] = nodes.add(index[state], action, child_cost)
+                    if child == goal and child_cost < goal_cost: goal_cost, goal_index = child_cost, index[child]
+                    if child not in h_values: h_values[child] = heuristic(problem, child)
+                    if child in closed:
+                        inconsistent.add(child)
+                    elif child in frontier:
+                        frontier.decrease(child, child_cost + weight * h_values[child])
+                    else:
+                        frontier.push(child, child_cost + weight * h_values[child])
+            # If no goal was found, the frontier is empty so there is no solution
+            if goal is None: break
+            lower_bound = min((nodes.cost(index[state]) + h_values[state] for state in index if state in frontier or state in inconsistent), default=goal_cost)
+            if lower_bound >= goal_cost:
+                bound = 1.0
+            elif lower_bound > 0:
+                bound = min(weight, goal_cost / lower_bound)
+            else:
+                bound = weight
+            # Only yield when the solution or its bound improved
+            if (goal_cost, bound) != last:
+                last = (goal_cost, bound)
+                yield nodes.path(goal_index), goal_cost, bound
+            if bound <= 1: break
+    finally:
+        # The statistics are also closed if the caller stops iterating early
+        if stats is not None: stats.end()
+
+# Returns the best solution that the anytime search finds before the deadline (in milliseconds from the call)
+# or None if no solution was found in time. It can be used with the InformedSearchAgent, for example:
+#   InformedSearchAgent(lambda problem, state, heuristic: AnytimeSearch(problem, state, heuristic, deadline_ms=100), heuristic, cache_failures=False)
+# A None may only mean that the deadline passed, so "cache_failures=False" lets the agent search again on the next step.
+def AnytimeSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, deadline_ms: float = 1000,
+                  weights: Sequence[float] = DEFAULT_WEIGHTS) -> Solution:
+    deadline = time.perf_counter() + deadline_ms / 1000
+    best = None
+    for solution, _, _ in AnytimeRepairingAStarSearch(problem, initial_state, heuristic, weights, deadline):
+        best = solution
+    return best
@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Generic, Hashable, Optional, Set
+import dbm
+import math
+import os
+import shutil
+import tempfile
+
+from problem import S
+
+# This file contains the closed set (explored set) backends that can be given to the searches in "search.py".
+# By default, the searches use a python set of the full states, which is the fastest option but it dominates the memory
+# of long searches (e.g. every DungeonState holds a frozenset of coins).
+# A closed set only needs to support "add", "in" and "len" so a python set also satisfies this interface.
+# The given closed set must be empty (and it should not be shared between searches).
+
+# The interface of a closed set
+class ClosedSet(ABC, Generic[S]):
+    # Mark the given state as explored
+    @abstractmethod
+    def add(self, state: S) -> None:
+        pass
+
+    # Check whether the given state was explored
+    @abstractmethod
+    def __contains__(self, state: S) -> bool:
+        pass
+
+    # Returns the number of explored states
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+# An exact closed set that stores a compact encoding of every state instead of the state itself
+# The encoding must be injective (two different states must never have the same key), for example:
+#   CompactDungeonProblem.from_problem(problem).from_dungeon_state for the dungeon states (a tuple of two integers)
+#   PackedParkingProblem.from_problem(problem).pack for the parking states (a tuple of small integers)
+class ExactClosedSet(ClosedSet[S]):
+    def __init__(self, encode: Callable[[S], Hashable]) -> None:
+        self.encode = encode
+        self.keys: Set[Hashable] = set()
+
+    def add(self, state: S) -> None:
+        self.keys.add(self.encode(state))
+
+    def __contains__(self, state: S) -> bool:
+        return self.encode(state) in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+# A probabilistic closed set (bit-state hashing): every state sets "hashes" bits in a bit array of "bits" bits
+# and a state is considered explored if all its bits are set. It never stores the states so its memory is fixed,
+# but a new state can be wrongly considered explored (a false positive) and then it is pruned.
+# So the search is only approximately exhaustive: it can miss some solutions or return a suboptimal one.
+# The probability of a false positive can be estimated using "false_positive_rate".
+# Note: the bits depend on the hash of the states so it is only reproducible between runs if the state hashes are
+# (e.g. the compact states which are tuples of integers). An "encode" function can be given to hash a compact encoding instead.
+class BitStateClosedSet(ClosedSet[S]):
+    def __init__(self, bits: int = 1 << 27, hashes: int = 3, encode: Optional[Callable[[S], Hashable]] = None) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self.encode = encode
+        self.array = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    # Returns the indices of the bits of a state (using double hashing on a mixed 64-bit hash)
+    def _indices(self, state: S):
+        key = state if self.encode is None else self.encode(state)
+        # The hash is mixed since the hash of small integers is the integer itself
+        value = (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        first, step = value >> 32, (value & 0xFFFFFFFF) | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def add(self, state: S) -> None:
+        array = self.array
+        is_new = False
+        for index in self._indices(state):
+            mask = 1 << (index & 7)
+            if not array[index >> 3] & mask:
+                array[index >> 3] |= mask
+                is_new = True
+        # Only the states that set a new bit are counted (the others were already considered explored)
+        if is_new: self.count += 1
+
+    def __contains__(self, state: S) -> bool:
+        array = self.array
+        return all(array[index >> 3] & (1 << (index & 7)) for index in self._indices(state))
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Returns the estimated probability that an unexplored state is considered explored
+    def false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+# An exact closed set that keeps at most "memory_limit" keys in memory and spills the rest to a database on disk
+# The encoding must return a string (or bytes) that is the same for equal states, for example:
+#   lambda state: repr(compact.from_dungeon_state(state)) for the dungeon states
+# (the default "repr" only works for states whose representation is canonical, like tuples of integers).
+# If no path is given, the database is created in a temporary directory which is deleted by "close".
+# The closed set can be used in a "with" statement to close it automatically.
+class DiskClosedSet(ClosedSet[S]):
+    def __init__(self, encode: Callable[[S], str] = repr, memory_limit: int = 1000000, path: Optional[str] = None) -> None:
+        self.encode = encode
+        self.memory_limit = memory_limit
+        self.directory = None
+        if path is None:
+            self.directory = tempfile.mkdtemp(prefix="closed_set_")
+            path = os.path.join(self.directory, "closed")
+        self.database = dbm.open(path, "n")
+        self.memory: Set[str] = set()
+        self.spilled = 0
+
+    # Write all the keys in memory to the database
+    def _spill(self) -> None:
+        database = self.database
+        for key in self.memory:
+            database[key] = b""
+        self.spilled += len(self.memory)
+        self.memory.clear()
+
+    def add(self, state: S) -> None:
+        key = self.encode(state)
+        if key in self.memory or (self.spilled and key in self.database): return
+        self.memory.add(key)
+        if len(self.memory) >= self.memory_limit:
+            self._spill()
+
+    def __contains__(self, state: S) -> bool:
+        key = self.encode(state)
+        return key in self.memory or (self.spilled != 0 and key in self.database)
+
+    def __len__(self) -> int:
+        return len(self.memory) + self.spilled
+
+    # Close the database (and delete it if it was created in a temporary directory)
+    def close(self) -> None:
+        if self.database is None: return
+        self.database.close()
+        self.database = None
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> 'DiskClosedSet[S]':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
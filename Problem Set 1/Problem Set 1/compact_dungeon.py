@@ -0,0 +1,109 @@
+from typing import Iterable, List, Tuple
+
+from dungeon import DungeonLayout, DungeonProblem, DungeonState
+from dungeon_heuristic import estimate_remaining_cost
+from mathutils import Direction, Point, euclidean_distance
+from problem import Problem
+from helpers.utils import track_call_count
+
+# This file contains a compact encoding of the Dungeon Scavenger problem
+# The state is a tuple of two integers (player cell, coin mask) where:
+#   the player cell is the id of the player location: y * width + x
+#   the coin mask is the bitmask of the remaining coins (bit i is set if layout.coins[i] was not collected yet)
+# So the successors are built without allocating frozensets or Point objects and the states are very cheap to hash.
+CompactDungeonState = Tuple[int, int]
+
+# This is the compact implementation of the dungeon problem
+# It has the same actions and costs as the DungeonProblem so all the searches and heuristics work on it
+class CompactDungeonProblem(Problem[CompactDungeonState, Direction]):
+    layout: DungeonLayout
+    initial_state: CompactDungeonState
+    moves: List[List[Direction]]                # moves[cell] is the list of directions that do not lead into a wall (in Direction order)
+    targets: List[List[int]]                    # targets[cell][direction] is the cell reached by moving in this direction (-1 if it is a wall)
+    coin_bits: List[int]                        # coin_bits[cell] is the bit of the coin at this cell (0 if there is no coin)
+    exit: int                                   # The cell of the exit
+
+    def get_initial_state(self) -> CompactDungeonState:
+        return self.initial_state
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @track_call_count
+    def is_goal(self, state: CompactDungeonState) -> bool:
+        return state[1] == 0 and state[0] == self.exit
+
+    def get_actions(self, state: CompactDungeonState) -> Iterable[Direction]:
+        return self.moves[state[0]]
+
+    def get_successor(self, state: CompactDungeonState, action: Direction) -> CompactDungeonState:
+        player = self.targets[state[0]][action]
+        if player < 0:
+            # If we try to walk into a wall, the state does not change
+            return state
+        # If we walk over a coin, we take it
+        return (player, state[1] & ~self.coin_bits[player])
+
+    def get_cost(self, state: CompactDungeonState, action: Direction) -> float:
+        # All actions have the same cost
+        return 1
+
+    def expand(self, state: CompactDungeonState) -> Iterable[Tuple[Direction, CompactDungeonState, float]]:
+        cell, mask = state
+        targets, coin_bits = self.targets[cell], self.coin_bits
+        return [(direction, (targets[direction], mask & ~coin_bits[targets[direction]]), 1) for direction in self.moves[cell]]
+
+    # Convert a compact state to the equivalent DungeonState
+    def to_dungeon_state(self, state: CompactDungeonState) -> DungeonState:
+        player, mask = state
+        coins = frozenset(coin for index, coin in enumerate(self.layout.coins) if mask >> index & 1)
+        return DungeonState(self.layout, Point(player % self.layout.width, player // self.layout.width), coins)
+
+    # Convert a DungeonState (of the same layout) to the equivalent compact state
+    def from_dungeon_state(self, state: DungeonState) -> CompactDungeonState:
+        return (state.player.y * self.layout.width + state.player.x, state.coin_mask())
+
+    # Returns the grid representation of the level at the given state
+    def state_to_str(self, state: CompactDungeonState) -> str:
+        return str(self.to_dungeon_state(state))
+
+    # Create the compact version of a dungeon problem (both problems share the same layout)
+    @staticmethod
+    def from_problem(problem: DungeonProblem) -> 'CompactDungeonProblem':
+        layout = problem.layout
+        width, size = layout.width, layout.width * layout.height
+        compact = CompactDungeonProblem()
+        compact.layout = layout
+        compact.moves = [[] for _ in range(size)]
+        compact.targets = [[-1] * len(Direction) for _ in range(size)]
+        for point in layout.walkable:
+            cell = point.y * width + point.x
+            for direction in Direction:
+                target = point + direction.to_vector()
+                # Disallow walking into walls (and out of the grid)
+                if target in layout.walkable:
+                    compact.moves[cell].append(direction)
+                    compact.targets[cell][direction] = target.y * width + target.x
+        compact.coin_bits = [0] * size
+        for coin, bit in layout.coin_bits.items():
+            compact.coin_bits[coin.y * width + coin.x] = bit
+        compact.exit = layout.exit.y * width + layout.exit.x
+        compact.initial_state = compact.from_dungeon_state(problem.initial_state)
+        return compact
+
+    # Read a compact dungeon problem from text containing a grid of tiles
+    @staticmethod
+    def from_text(text: str) -> 'CompactDungeonProblem':
+        return CompactDungeonProblem.from_problem(DungeonProblem.from_text(text))
+
+    # Read a compact dungeon problem from file containing a grid of tiles
+    @staticmethod
+    def from_file(path: str) -> 'CompactDungeonProblem':
+        return CompactDungeonProblem.from_problem(DungeonProblem.from_file(path))
+
+# The same heuristics as in "dungeon_heuristic.py" for the compact states
+
+def compact_weak_heuristic(problem: CompactDungeonProblem, state: CompactDungeonState) -> float:
+    width = problem.layout.width
+    return euclidean_distance(Point(state[0] % width, state[0] // width), problem.layout.exit)
+
+def compact_strong_heuristic(problem: CompactDungeonProblem, state: CompactDungeonState) -> float:
+    return estimate_remaining_cost(problem, state[0], state[1])
@@ -0,0 +1,208 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+import json
+import math
+
+from problem import Problem
+from helpers.utils import track_call_count
+
+# This file contains a memory-efficient alternative to the GraphRoutingProblem for very large graphs:
+#   - a streaming loader that parses the graph file incrementally (one node at a time) instead of loading the whole json
+#   - a compact graph store in CSR (compressed sparse row) format where the nodes are integer ids:
+#       the neighbors of node 'i' are targets[offsets[i]:offsets[i+1]] (sorted by name like in GraphRoutingProblem),
+#       the positions are stored as float32 arrays and the names are only kept in a name table.
+
+# A minimal incremental json reader that reads the file in chunks and can decode one value at a time
+class _JsonStream:
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    # Read the next chunk from the file (dropping the consumed part of the buffer). Returns False at the end of the file
+    def fill(self) -> bool:
+        if self.eof: return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    # Returns the next non-whitespace character without consuming it ("" at the end of the file)
+    def peek(self) -> str:
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill():
+                return self.buffer[self.position:self.position+1]
+
+    # Consume the next non-whitespace character and check that it is the expected one
+    def expect(self, expected: str) -> None:
+        char = self.peek()
+        if char != expected:
+            raise ValueError(f"Invalid graph file: expected '{expected}' but found '{char}'")
+        self.position += 1
+
+    # Decode the next json value
+    # A value that ends at the end of the buffer may be incomplete (e.g. a number) so we read more data before accepting it
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof: raise
+            self.fill()
+
+# Read a graph file incrementally and yield the nodes one by one as (name, definition) where the definition contains
+# the "position" and the "adjacent" list of the node. The other top-level fields (e.g. "start" and "goal") are stored in "fields".
+def iter_graph_file(path: str, fields: Dict[str, Any], chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    with open(path, 'r') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        while stream.peek() != "}":
+            key = stream.value()
+            stream.expect(":")
+            if key == "graph":
+                stream.expect("{")
+                while stream.peek() != "}":
+                    name = stream.value()
+                    stream.expect(":")
+                    yield name, stream.value()
+                    if stream.peek() == ",": stream.expect(",")
+                stream.expect("}")
+            else:
+                fields[key] = stream.value()
+            if stream.peek() == ",": stream.expect(",")
+        stream.expect("}")
+
+# The compact graph store
+class CompactGraph:
+    __slots__ = ("names", "ids", "xs", "ys", "offsets", "targets")
+
+    def __init__(self, names: List[str], xs: array, ys: array, offsets: array, targets: array) -> None:
+        self.names = names                              # names[i] is the name of node 'i'
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.xs = xs                                    # The x coordinate of every node (float32)
+        self.ys = ys                                    # The y coordinate of every node (float32)
+        self.offsets = offsets                          # The neighbors of node 'i' are targets[offsets[i]:offsets[i+1]]
+        self.targets = targets
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # Returns the neighbors of a node
+    def neighbors(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node+1]]
+
+    # Returns the euclidean distance between two nodes
+    def distance(self, node1: int, node2: int) -> float:
+        dx, dy = self.xs[node1] - self.xs[node2], self.ys[node1] - self.ys[node2]
+        return math.sqrt(dx * dx + dy * dy)
+
+    # Build the compact graph from a graph file using the streaming loader
+    # Returns the graph and the other top-level fields of the file (e.g. "start" and "goal")
+    @staticmethod
+    def from_file(path: str, chunk_size: int = 1 << 16) -> Tuple['CompactGraph', Dict[str, Any]]:
+        fields: Dict[str, Any] = {}
+        # Every name gets a temporary id when it is seen for the first time (as a node or as a neighbor)
+        # since a node can reference neighbors that are defined later in the file
+        temporary_ids: Dict[str, int] = {}
+        defined: List[int] = []                          # The temporary ids of the defined nodes in their order in the file
+        xs, ys = array('f'), array('f')
+        sources, targets = array('l'), array('l')        # The edges as pairs of temporary ids
+        for name, item in iter_graph_file(path, fields, chunk_size):
+            node = temporary_ids.setdefault(name, len(temporary_ids))
+            defined.append(node)
+            x, y = item.get("position", [0, 0])
+            xs.append(x)
+            ys.append(y)
+            for adjacent in item.get("adjacent", []):
+                sources.append(node)
+                targets.append(temporary_ids.setdefault(adjacent, len(temporary_ids)))
+        # The final ids follow the order of definition. The neighbors that are never defined are dropped (as in GraphRoutingProblem)
+        final_ids = array('l', [-1]) * len(temporary_ids)
+        for final_id, node in enumerate(defined):
+            final_ids[node] = final_id
+        names: List[Optional[str]] = [None] * len(defined)
+        for name, node in temporary_ids.items():
+            if final_ids[node] >= 0:
+                names[final_ids[node]] = name
+        del temporary_ids
+        # Build the CSR arrays using a counting sort of the edges by source
+        offsets = array('l', [0]) * (len(defined) + 1)
+        for source, target in zip(sources, targets):
+            if final_ids[target] >= 0:
+                offsets[final_ids[source] + 1] += 1
+        for i in range(len(defined)):
+            offsets[i + 1] += offsets[i]
+        filled = array('l', offsets[:-1])
+        csr_targets = array('l', [0]) * offsets[-1]
+        for source, target in zip(sources, targets):
+            target = final_ids[target]
+            if target >= 0:
+                source = final_ids[source]
+                csr_targets[filled[source]] = target
+                filled[source] += 1
+        del sources, targets, filled
+        # Sort the neighbors of every node by name
+        for i in range(len(defined)):
+            begin, end = offsets[i], offsets[i + 1]
+            if end - begin > 1:
+                csr_targets[begin:end] = array('l', sorted(csr_targets[begin:end], key=names.__getitem__))
+        return CompactGraph(names, xs, ys, offsets, csr_targets), fields
+
+# This is the graph routing problem on a compact graph where the states and actions are node ids
+# It has the same actions (in the same order) and costs as the GraphRoutingProblem built from the same file,
+# so the searches produce the same results (the node names can be recovered using "to_names")
+class CompactGraphRoutingProblem(Problem[int, int]):
+    def __init__(self, graph: CompactGraph, start: int, goal: int) -> None:
+        super().__init__()
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+
+    def get_initial_state(self) -> int:
+        return self.start
+
+    # We use @track_call_count (instead of recording every call) since the graphs can be very large
+    @track_call_count
+    def is_goal(self, state: int) -> bool:
+        return state == self.goal
+
+    # The actions for this problem are the neighboring nodes we can reach from the current node
+    def get_actions(self, state: int) -> array:
+        return self.graph.neighbors(state)
+
+    # The next state and the action are the exact same thing for this problem
+    def get_successor(self, state: int, action: int) -> int:
+        return action
+
+    # The cost of an action is the distance between the current node and the next node
+    def get_cost(self, state: int, action: int) -> float:
+        return self.graph.distance(state, action)
+
+    def expand(self, state: int) -> List[Tuple[int, int, float]]:
+        distance = self.graph.distance
+        return [(node, node, distance(state, node)) for node in self.graph.neighbors(state)]
+
+    # Convert a list of node ids (e.g. a solution) to their names
+    def to_names(self, nodes: List[int]) -> List[str]:
+        return [self.graph.names[node] for node in nodes]
+
+    # Read a compact graph routing problem from file using the streaming loader
+    @staticmethod
+    def from_file(path: str, chunk_size: int = 1 << 16) -> 'CompactGraphRoutingProblem':
+        graph, fields = CompactGraph.from_file(path, chunk_size)
+        return CompactGraphRoutingProblem(graph, graph.ids[fields.get("start", "")], graph.ids[fields.get("goal", "")])
+
+def compact_graphrouting_heuristic(problem: CompactGraphRoutingProblem, state: int) -> float:
+    return problem.graph.distance(state, problem.goal)
@@ -0,0 +1,191 @@
+from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+
+from graph import GraphNode, GraphRoutingProblem
+from landmarks import get_indexed_graph
+from problem import Solution
+
+# The maximum number of nodes settled by a witness search before giving up (and adding the shortcut anyway)
+WITNESS_SETTLE_LIMIT = 500
+
+# This file contains a contraction hierarchy (CH) for answering many shortest path queries on the same graph.
+# The nodes are contracted one by one (the order is their rank). Contracting a node 'v' removes it from the remaining graph and
+# adds a shortcut u->w for every pair of edges u->v->w unless a witness path from u to w that avoids 'v' is at most as short.
+# After the build, every shortest path can be found by a bidirectional Dijkstra where both sides only move to higher ranked nodes:
+# the forward side uses the upward edges and the backward side uses the downward edges in reverse.
+# The shortcuts remember the node they skip so the path can be unpacked into original edges.
+class ContractionHierarchy:
+    __slots__ = ("nodes", "indices", "rank", "upward", "downward", "middles")
+
+    def __init__(self, nodes: List[GraphNode], indices: Dict[GraphNode, int], rank: List[int],
+                 upward: List[List[Tuple[int, float]]], downward: List[List[Tuple[int, float]]], middles: Dict[Tuple[int, int], int]) -> None:
+        self.nodes = nodes              # nodes[i] is the graph node with the index 'i'
+        self.indices = indices          # The index of every graph node
+        self.rank = rank                # rank[i] is the contraction order of the node 'i'
+        self.upward = upward            # upward[u] contains the edges u->w (as (w, cost)) where w has a higher rank
+        self.downward = downward        # downward[w] contains the edges u->w (as (u, cost)) where u has a higher rank
+        self.middles = middles          # middles[(u, w)] is the node skipped by the shortcut u->w
+
+    # Unpack an edge of the hierarchy into the list of original nodes it goes through (excluding u)
+    def unpack(self, u: int, w: int) -> List[int]:
+        path, stack = [], [(u, w)]
+        while stack:
+            u, w = stack.pop()
+            middle = self.middles.get((u, w))
+            if middle is None:
+                path.append(w)
+            else:
+                # Push the second half first so the first half is unpacked first
+                stack.append((middle, w))
+                stack.append((u, middle))
+        return path
+
+    # Find the shortest path between two nodes (given their indices)
+    # Returns the cost and the list of node indices after the start (or None if there is no path)
+    def shortest_path(self, start: int, goal: int) -> Optional[Tuple[float, List[int]]]:
+        if start == goal: return 0, []
+        distances = ({start: 0}, {goal: 0})
+        parents: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        queues = ([(0, start)], [(0, goal)])
+        edges = (self.upward, self.downward)
+        best, meeting = math.inf, None
+        while queues[0] or queues[1]:
+            # Expand the side with the smallest distance at the top of its queue
+            side = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            distance, node = heapq.heappop(queues[side])
+            # The top of every queue can only grow, so no better meeting point can be found after this
+            if distance >= best: break
+            if distance > distances[side][node]: continue
+            other = distances[1 - side].get(node)
+            if other is not None and distance + other < best:
+                best, meeting = distance + other, node
+            for next_node, cost in edges[side][node]:
+                next_distance = distance + cost
+                if next_distance < distances[side].get(next_node, math.inf):
+                    distances[side][next_node] = next_distance
+                    parents[side][next_node] = node
+                    heapq.heappush(queues[side], (next_distance, next_node))
+        if meeting is None: return None
+        # Rebuild the sequence of hierarchy nodes from the start to the goal through the meeting point
+        hierarchy_path = [meeting]
+        while hierarchy_path[-1] != start:
+            hierarchy_path.append(parents[0][hierarchy_path[-1]])
+        hierarchy_path.reverse()
+        while hierarchy_path[-1] != goal:
+            hierarchy_path.append(parents[1][hierarchy_path[-1]])
+        path = []
+        for u, w in zip(hierarchy_path, hierarchy_path[1:]):
+            path.extend(self.unpack(u, w))
+        return best, path
+
+    # Find the shortest path between two graph nodes and return it as a list of actions (the graph nodes after the start)
+    def query(self, start: GraphNode, goal: GraphNode) -> Solution:
+        result = self.shortest_path(self.indices[start], self.indices[goal])
+        if result is None: return None
+        return [self.nodes[node] for node in result[1]]
+
+# Run a Dijkstra from 'source' on the remaining graph without going through 'ignored'
+# It stops once all the targets are settled, the distance exceeds 'limit' or after settling WITNESS_SETTLE_LIMIT nodes
+def _witness_distances(outgoing: List[Dict[int, float]], source: int, ignored: int, targets: Dict[int, float], limit: float) -> Dict[int, float]:
+    distances = {source: 0}
+    queue = [(0, source)]
+    settled, remaining = 0, len(targets)
+    while queue and settled < WITNESS_SETTLE_LIMIT:
+        distance, node = heapq.heappop(queue)
+        if distance > distances[node]: continue
+        if distance > limit: break
+        settled += 1
+        if node in targets:
+            remaining -= 1
+            if remaining == 0: break
+        for next_node, cost in outgoing[node].items():
+            if next_node == ignored: continue
+            next_distance = distance + cost
+            if next_distance < distances.get(next_node, math.inf):
+                distances[next_node] = next_distance
+                heapq.heappush(queue, (next_distance, next_node))
+    return distances
+
+# Returns the shortcuts (u, w, cost) needed to contract the node 'v' from the remaining graph
+def _find_shortcuts(outgoing: List[Dict[int, float]], incoming: List[Dict[int, float]], v: int) -> List[Tuple[int, int, float]]:
+    shortcuts = []
+    if not incoming[v] or not outgoing[v]: return shortcuts
+    max_out = max(outgoing[v].values())
+    for u, in_cost in incoming[v].items():
+        witness = _witness_distances(outgoing, u, v, outgoing[v], in_cost + max_out)
+        for w, out_cost in outgoing[v].items():
+            if w == u: continue
+            if witness.get(w, math.inf) > in_cost + out_cost:
+                shortcuts.append((u, w, in_cost + out_cost))
+    return shortcuts
+
+# Build the contraction hierarchy of a graph routing problem
+# The nodes are ordered by their edge difference (the number of shortcuts needed minus the number of removed edges)
+# plus the number of their contracted neighbors and their level in the hierarchy (to spread the contraction uniformly over the graph).
+# The priorities are updated lazily: the popped node is re-evaluated and pushed back if it is no longer the best.
+def build_contraction_hierarchy(problem: GraphRoutingProblem) -> ContractionHierarchy:
+    nodes, indices, successors = get_indexed_graph(problem)
+    size = len(nodes)
+    # The remaining graph (only the cheapest edge is kept between two nodes, self loops are useless in shortest paths)
+    outgoing: List[Dict[int, float]] = [{} for _ in range(size)]
+    incoming: List[Dict[int, float]] = [{} for _ in range(size)]
+    for u, adjacent in enumerate(successors):
+        for w, cost in adjacent:
+            if u != w and cost < outgoing[u].get(w, math.inf):
+                outgoing[u][w] = incoming[w][u] = cost
+    middles: Dict[Tuple[int, int], int] = {}
+    contracted_neighbors = [0] * size
+    levels = [0] * size
+
+    def priority(v: int) -> int:
+        return 2 * (len(_find_shortcuts(outgoing, incoming, v)) - len(incoming[v]) - len(outgoing[v])) + contracted_neighbors[v] + levels[v]
+
+    queue = [(priority(v), v) for v in range(size)]
+    heapq.heapify(queue)
+    rank = [-1] * size
+    upward: List[List[Tuple[int, float]]] = [[] for _ in range(size)]
+    downward: List[List[Tuple[int, float]]] = [[] for _ in range(size)]
+    order = 0
+    while queue:
+        _, v = heapq.heappop(queue)
+        if rank[v] >= 0: continue
+        current = priority(v)
+        if queue and current > queue[0][0]:
+            heapq.heappush(queue, (current, v))
+            continue
+        rank[v] = order
+        order += 1
+        # All the remaining neighbors will be contracted later, so they have a higher rank
+        for w, cost in outgoing[v].items():
+            upward[v].append((w, cost))
+        for u, cost in incoming[v].items():
+            downward[v].append((u, cost))
+        for u, w, cost in _find_shortcuts(outgoing, incoming, v):
+            if cost < outgoing[u].get(w, math.inf):
+                outgoing[u][w] = incoming[w][u] = cost
+                middles[(u, w)] = v
+        for w in outgoing[v]:
+            del incoming[w][v]
+            contracted_neighbors[w] += 1
+            levels[w] = max(levels[w], levels[v] + 1)
+        for u in incoming[v]:
+            del outgoing[u][v]
+            contracted_neighbors[u] += 1
+            levels[u] = max(levels[u], levels[v] + 1)
+        outgoing[v], incoming[v] = {}, {}
+    return ContractionHierarchy(nodes, indices, rank, upward, downward, middles)
+
+# Returns the contraction hierarchy of the problem's graph
+# It is built once per problem and stored in the problem cache so that all the queries on the same problem share it
+def get_contraction_hierarchy(problem: GraphRoutingProblem) -> ContractionHierarchy:
+    cache = problem.cache()
+    hierarchy = cache.get("contraction_hierarchy")
+    if hierarchy is None:
+        hierarchy = cache["contraction_hierarchy"] = build_contraction_hierarchy(problem)
+    return hierarchy
+
+# A search function (with the same interface as the uninformed searches) that answers the query using the contraction hierarchy
+def ContractionHierarchySearch(problem: GraphRoutingProblem, initial_state: GraphNode) -> Solution:
+    if problem.is_goal(initial_state): return []
+    return get_contraction_hierarchy(problem).query(initial_state, problem.goal)
@@ -0,0 +1,162 @@
+from array import array
+from collections import deque
+from typing import Optional, Tuple
+import argparse
+import math
+import time
+
+from compact_dungeon import CompactDungeonProblem, CompactDungeonState
+from dungeon import DungeonProblem, DungeonState
+from persistence import cache_path, fingerprint, map_arrays, save_arrays
+from problem import HeuristicFunction
+
+# The value stored in the cost-to-go table for the states that cannot reach the goal
+UNREACHABLE = 0xFFFF
+# The largest table (in entries) that we agree to build: cells * 2^coins
+MAX_TABLE_SIZE = 1 << 26
+
+# This file contains an offline solver for small dungeons.
+# The state space (player cell x coin mask) is small enough to be enumerated completely, so instead of running A* for every
+# request, a backward BFS from the goal computes the exact cost to the goal of every state at once.
+# The costs are stored in a flat array('H') where table[mask * cells + cell] is the cost of the state (cell, mask)
+# (cells = width * height). The table is saved to the cache directory and memory-mapped when it is loaded again.
+# Once the table exists, the best action of any state is found in O(1) (see agents.CostToGoAgent)
+# and the table is a perfect heuristic which can be used to validate other heuristics (see "validate_heuristic").
+
+# The cost-to-go table of a dungeon layout
+class CostToGoTable:
+    __slots__ = ("cells", "values")
+
+    def __init__(self, cells: int, values) -> None:
+        self.cells = cells          # The number of cells (width * height)
+        self.values = values        # The costs (an array or a memoryview of a mapped file)
+
+    # Returns the exact cost to the goal from the given player cell and coin mask (inf if the goal cannot be reached)
+    def cost(self, cell: int, mask: int) -> float:
+        value = self.values[mask * self.cells + cell]
+        return math.inf if value == UNREACHABLE else value
+
+# Returns a key that identifies the layout (walls, exit and coins in the order of their bits)
+def layout_fingerprint(problem: DungeonProblem) -> str:
+    layout = problem.layout
+    width = layout.width
+    walkable = sorted(point.y * width + point.x for point in layout.walkable)
+    coins = [coin.y * width + coin.x for coin in layout.coins]
+    return fingerprint("dungeon", layout.width, layout.height, walkable, layout.exit.y * width + layout.exit.x, coins)
+
+# Enumerate the states that are reachable from the initial state of the compact problem
+# Returns a bytearray indexed like the cost-to-go table where reachable[mask * cells + cell] is 1 if the state is reachable
+def enumerate_reachable(problem: CompactDungeonProblem, initial_state: Optional[CompactDungeonState] = None) -> bytearray:
+    cells = problem.layout.width * problem.layout.height
+    if initial_state is None: initial_state = problem.get_initial_state()
+    reachable = bytearray(cells << len(problem.layout.coins))
+    reachable[initial_state[1] * cells + initial_state[0]] = 1
+    queue = deque([initial_state])
+    while queue:
+        state = queue.popleft()
+        for _, child, _ in problem.expand(state):
+            index = child[1] * cells + child[0]
+            if not reachable[index]:
+                reachable[index] = 1
+                queue.append(child)
+    return reachable
+
+# Build the cost-to-go table with a backward BFS from the goal states (the exit with no remaining coins)
+# The moves are reversible, so the predecessors of (cell, mask) are the states (neighbor, previous mask) where the neighbor
+# is adjacent to the cell and the previous mask is the same mask or, if the cell has a coin, the mask with this coin
+# (the coin was collected by entering the cell). A state where the player stands on a remaining coin has no predecessor.
+def build_cost_to_go(problem: DungeonProblem) -> CostToGoTable:
+    compact = CompactDungeonProblem.from_problem(problem)
+    cells = problem.layout.width * problem.layout.height
+    size = cells << len(problem.layout.coins)
+    if size > MAX_TABLE_SIZE:
+        raise ValueError(f"The cost-to-go table would have {size} entries (the maximum is {MAX_TABLE_SIZE})")
+    neighbors = [[target for target in targets if target >= 0] for targets in compact.targets]
+    coin_bits = compact.coin_bits
+    table = array('H', [UNREACHABLE]) * size
+    goals = [compact.exit]
+    for goal in goals:
+        table[goal] = 0
+    queue = deque(goals)
+    while queue:
+        index = queue.popleft()
+        mask, cell = divmod(index, cells)
+        cost = table[index] + 1
+        if cost >= UNREACHABLE:
+            raise ValueError("The cost to the goal does not fit in the table")
+        bit = coin_bits[cell]
+        masks = (mask, mask | bit) if bit else (mask,)
+        for previous in neighbors[cell]:
+            previous_bit = coin_bits[previous]
+            for previous_mask in masks:
+                if previous_mask & previous_bit: continue
+                previous_index = previous_mask * cells + previous
+                if table[previous_index] == UNREACHABLE:
+                    table[previous_index] = cost
+                    queue.append(previous_index)
+    return CostToGoTable(cells, table)
+
+# Returns the cost-to-go table of the problem
+# It is memory-mapped from the cache directory if it was built before (for the same layout), otherwise it is built and saved there.
+# It is also stored in the problem cache so it is only loaded once per problem
+def get_cost_to_go(problem: DungeonProblem, directory: Optional[str] = None) -> CostToGoTable:
+    cache = problem.cache()
+    table = cache.get("cost_to_go")
+    if table is None:
+        path = cache_path("dungeon_cost_to_go", layout_fingerprint(problem), directory)
+        arrays = map_arrays(path)
+        if arrays is None:
+            table = build_cost_to_go(problem)
+            save_arrays(path, {"costs": table.values})
+        else:
+            table = CostToGoTable(problem.layout.width * problem.layout.height, arrays["costs"])
+        cache["cost_to_go"] = table
+    return table
+
+# The perfect heuristic (the exact cost to the goal) for the dungeon states
+def cost_to_go_heuristic(problem: DungeonProblem, state: DungeonState) -> float:
+    return get_cost_to_go(problem).cost(state.player.y * problem.layout.width + state.player.x, state.coin_mask())
+
+# Compare a heuristic with the exact costs on every state reachable from the initial state
+# Returns the number of states where the heuristic overestimates the cost (it is admissible if this is 0)
+# and the average ratio between the heuristic and the exact cost over the states that can reach the goal (1 for a perfect heuristic)
+def validate_heuristic(problem: DungeonProblem, heuristic: HeuristicFunction) -> Tuple[int, float]:
+    table = get_cost_to_go(problem)
+    compact = CompactDungeonProblem.from_problem(problem)
+    reachable = enumerate_reachable(compact)
+    cells = table.cells
+    overestimates, ratios, count = 0, 0.0, 0
+    for index, is_reachable in enumerate(reachable):
+        if not is_reachable: continue
+        mask, cell = divmod(index, cells)
+        cost = table.cost(cell, mask)
+        if cost == math.inf: continue
+        h = heuristic(problem, compact.to_dungeon_state((cell, mask)))
+        if h > cost: overestimates += 1
+        if cost > 0:
+            ratios += h / cost
+            count += 1
+    return overestimates, (ratios / count if count else 1.0)
+
+def main(args: argparse.Namespace):
+    problem = DungeonProblem.from_file(args.level)
+    start = time.time()
+    table = get_cost_to_go(problem, args.directory)
+    print(f"Table ready in {time.time() - start} seconds ({len(table.values)} entries)")
+    reachable = enumerate_reachable(CompactDungeonProblem.from_problem(problem))
+    print(f"Reachable states: {sum(reachable)} of {len(reachable)}")
+    print(f"Cost from the initial state: {cost_to_go_heuristic(problem, problem.get_initial_state())}")
+    if args.heuristic:
+        from helpers.utils import load_function
+        overestimates, ratio = validate_heuristic(problem, load_function(args.heuristic))
+        print(f"Heuristic '{args.heuristic}': {overestimates} overestimated states, average h/h* = {ratio}")
+
+if __name__ == "__main__":
+    # Read the arguments from the command line
+    parser = argparse.ArgumentParser(description="Build the exact cost-to-go table of a small dungeon")
+    parser.add_argument("level", help="path to the dungeon")
+    parser.add_argument("--directory", "-d", default=None,
+                        help="the directory where the table is stored (the cache directory by default)")
+    parser.add_argument("--heuristic", "-hf", default=None,
+                        help="a heuristic to validate against the table (e.g. dungeon_heuristic.strong_heuristic)")
+    main(parser.parse_args())
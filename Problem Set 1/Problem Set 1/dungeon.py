@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import FrozenSet, Iterable
+from typing import Dict, FrozenSet, Iterable, List, Tuple
 from enum import Enum
 
-from mathutils import Direction, Point
+from mathutils import Direction, Point, PointGrid, get_point_grid
 from problem import Problem
 from helpers.utils import track_call_count
 
@@ -23,14 +23,41 @@ class DungeonTile(str, Enum):
 # We disable the automatic equality implementation since we don't need it;
 # we only need the default equality which compares objects by pointers.
 # The layout contains the problem details that are unchangeable across states such as:
-#   The walkable area (locations without walls) and the exit location
+#   The walkable area (locations without walls), the exit location and the initial coin locations.
+# Every coin is given a bit index so that any set of coins can be represented as an integer bitmask
 @dataclass(eq=False, frozen=True)
 class DungeonLayout:
-    __slots__ = ("width", "height", "walkable", "exit")
+    __slots__ = ("width", "height", "walkable", "exit", "coins", "coin_bits")
     width: int
     height: int
     walkable: FrozenSet[Point]
     exit: Point
+    coins: Tuple[Point, ...]    # All the coins in the level where coins[i] is the coin with the bit index i
+    coin_bits: Dict[Point, int] # The bit (1 << i) of every coin
+
+    # Convert a set of coins into an integer bitmask where the bit i is set if coins[i] is in the set
+    def coin_mask(self, coins: Iterable[Point]) -> int:
+        bits = self.coin_bits
+        mask = 0
+        for coin in coins:
+            mask |= bits[coin]
+        return mask
+
+    # Frozen dataclasses with __slots__ cannot be unpickled by default, so we rebuild the layout from its fields.
+    # Since layouts are compared by identity, the layouts received from another process are interned (see "_receive_layout")
+    def __reduce__(self):
+        return (_receive_layout, (self.width, self.height, self.walkable, self.exit, self.coins, self.coin_bits))
+
+# The layouts that were unpickled in this process (keyed by their content)
+_received_layouts: Dict[Tuple, DungeonLayout] = {}
+
+# Returns the unpickled layout with the given fields, so that all the states of the same level share the same layout object
+def _receive_layout(width: int, height: int, walkable: FrozenSet[Point], exit: Point, coins: Tuple[Point, ...], coin_bits: Dict[Point, int]) -> DungeonLayout:
+    key = (width, height, walkable, exit, coins)
+    layout = _received_layouts.get(key)
+    if layout is None:
+        layout = _received_layouts[key] = DungeonLayout(width, height, walkable, exit, coins, coin_bits)
+    return layout
 
 # For the dungeon state, we use dataclass with frozen=True to automatically implement:
 #   the constructor, the == operator, the hash function and to make the class immutable
@@ -44,6 +71,14 @@ class DungeonState:
     player: Point
     remaining_coins: FrozenSet[Point]
 
+    # Returns the remaining coins as an integer bitmask (see DungeonLayout.coin_mask)
+    def coin_mask(self) -> int:
+        return self.layout.coin_mask(self.remaining_coins)
+
+    # Frozen dataclasses with __slots__ cannot be unpickled by default, so we rebuild the state from its fields
+    def __reduce__(self):
+        return (DungeonState, (self.layout, self.player, self.remaining_coins))
+
     # This operator will convert the state to a string containing the grid representation of the level at the current state
     def __str__(self) -> str:
         def position_to_str(position):
@@ -71,6 +106,10 @@ class DungeonProblem(Problem[DungeonState, Direction]):
     # The problem will contain the dungeon layout and the inital state
     layout: DungeonLayout
     initial_state: DungeonState
+    grid: PointGrid         # The shared points of the layout grid and their neighbors
+    # moves[cell] contains a (direction, neighbor, is_coin) triple for every walkable neighbor of the cell (in Direction order),
+    # so the moves are table lookups that do not hash the points to check the walls and only hash them on the coin cells
+    moves: List[List[Tuple[Direction, Point, bool]]]
 
     def get_initial_state(self) -> DungeonState:
         return self.initial_state
@@ -81,16 +120,11 @@ class DungeonProblem(Problem[DungeonState, Direction]):
         return len(state.remaining_coins) == 0 and state.player == self.layout.exit
 
     def get_actions(self, state: DungeonState) -> Iterable[Direction]:
-        actions = []
-        for direction in Direction:
-            position = state.player + direction.to_vector()
-            # Disallow walking into walls
-            if position not in self.layout.walkable: continue
-            actions.append(direction)
-        return actions
+        # Walking into walls is disallowed, so only the moves to the walkable neighbors are returned
+        return [direction for direction, _, _ in self.moves[self.grid.cell(state.player)]]
 
     def get_successor(self, state: DungeonState, action: Direction) -> DungeonState:
-        player = state.player + action.to_vector()
+        player = self.grid.neighbor(state.player, action)
         remaining_coins = state.remaining_coins
         if player not in self.layout.walkable:
             # If we try to walk into a wall, the state does not change
@@ -104,6 +138,15 @@ class DungeonProblem(Problem[DungeonState, Direction]):
         # All actions have the same cost
         return 1
 
+    # Every move that does not lead into a wall is expanded directly into its successor (with the same rules as "get_successor")
+    def expand(self, state: DungeonState) -> Iterable[Tuple[Direction, DungeonState, float]]:
+        successors = []
+        layout, remaining_coins = state.layout, state.remaining_coins
+        for direction, player, is_coin in self.moves[self.grid.cell(state.player)]:
+            coins = remaining_coins - {player} if is_coin and player in remaining_coins else remaining_coins
+            successors.append((direction, DungeonState(layout, player, coins), 1))
+        return successors
+
     # Read a dungeon problem from text containing a grid of tiles
     @staticmethod
     def from_text(text: str) -> 'DungeonProblem':
@@ -112,18 +155,28 @@ class DungeonProblem(Problem[DungeonState, Direction]):
         exit: Point = None
         lines = [line for line in (line.strip() for line in text.splitlines()) if line]
         width, height = max(len(line) for line in lines), len(lines)
+        grid = get_point_grid(width, height)
         for y, line in enumerate(lines):
             for x, char in enumerate(line):
                 if char != DungeonTile.WALL:
-                    walkable.add(Point(x, y))
+                    point = grid.point(x, y)
+                    walkable.add(point)
                     if char == DungeonTile.PLAYER:
-                        player = Point(x, y)
+                        player = point
                     elif char == DungeonTile.COIN:
-                        coins.add(Point(x, y))
+                        coins.add(point)
                     elif char == DungeonTile.EXIT:
-                        exit = Point(x, y)
+                        exit = point
         problem = DungeonProblem()
-        problem.layout = DungeonLayout(width, height, frozenset(walkable), exit)
+        problem.grid = grid
+        # The coins are ordered by row then column to give them their bit indices
+        ordered_coins = tuple(sorted(coins, key=lambda coin: (coin.y, coin.x)))
+        coin_bits = {coin: 1 << index for index, coin in enumerate(ordered_coins)}
+        problem.layout = DungeonLayout(width, height, frozenset(walkable), exit, ordered_coins, coin_bits)
+        problem.moves = [
+            [(direction, neighbors[cell], neighbors[cell] in coin_bits) for direction, neighbors in grid.directions if neighbors[cell] in walkable]
+            for cell in range(width * height)
+        ]
         problem.initial_state = DungeonState(problem.layout, player, frozenset(coins))
         return problem
 
@@ -1,6 +1,9 @@
 from dungeon import DungeonProblem, DungeonState
-from mathutils import Direction, Point, euclidean_distance, manhattan_distance
+from mathutils import Direction, euclidean_distance
+from maze_distances import UNREACHABLE, get_maze_distances
 from helpers import utils
+from typing import List, Tuple
+import math
 
 # This heuristic returns the distance between the player and the exit as an estimate for the path cost
 # While it is consistent, it does a bad job at estimating the actual cost thus the search will explore a lot of nodes before finding a goal
@@ -8,64 +11,98 @@ def weak_heuristic(problem: DungeonProblem, state: DungeonState):
     return euclidean_distance(state.player, problem.layout.exit)
 
 #TODO: Import any modules and write any functions you want to use
-def calculate_mst_cost(points: set[Point]) -> float:
+# Returns a flat list where distances[i * count + j] is the maze distance between the coins i and j of the layout
+# (count is the number of coins) and a list where exit_distances[i] is the maze distance between the coin i and the exit.
+# They are computed once per problem and stored in the problem cache
+# They are read from the BFS tables of the coins (see "maze_distances"), which the heuristic needs anyway
+# for the distances from the player, so no other search is done
+def get_coin_distances(problem: DungeonProblem) -> Tuple[List[float], List[float]]:
+    cache = problem.cache()
+    coin_distances = cache.get("coin_distances")
+    if coin_distances is None:
+        distance = get_maze_distances(problem).distance
+        coins, exit_point = problem.layout.coins, problem.layout.exit
+        distances = [distance(coin, other) for coin in coins for other in coins]
+        exit_distances = [distance(exit_point, coin) for coin in coins]
+        coin_distances = cache["coin_distances"] = (distances, exit_distances)
+    return coin_distances
+
+# Computes the cost of the minimum spanning tree of the coins in the bitmask using Prim's algorithm on the distance matrix.
+# The array-based version runs in O(k^2) where k is the number of coins in the mask
+def calculate_mst_cost(mask: int, distances: List[float], count: int) -> float:
+    indices = [index for index in range(count) if mask >> index & 1]
     # If there are no points or only one point in remaining_coins, 
     # there is no need for an MST, so the cost is 0.0.
-    if len(points) <= 1:
+    if len(indices) <= 1:
         return 0.0
-    
-    cost = 0.0
-    connected_points = {next(iter(points))}  # Start with an arbitrary point from the set
-    remaining_points = set(points - connected_points)  # The rest of the points
 
-    while len(remaining_points)>0:
-        min_edge_cost = float('inf')
-        nearest_point = None
-
-        # For each point in connected_points, 
-        # find the nearest point in remaining_points by calculating the Manhattan distance.
-        for connected_point in connected_points:
-            for point in remaining_points:
-                distance = manhattan_distance(connected_point, point)
-                if distance < min_edge_cost:
-                    min_edge_cost = distance
-                    nearest_point = point
+    cost = 0.0
+    # Start with an arbitrary point, min_edge[i] stores the cost of the cheapest edge between the tree and the point remaining[i]
+    first = indices[0]
+    remaining = indices[1:]
+    min_edge = [distances[first * count + index] for index in remaining]
 
-        # Update MST cost and add the nearest point to the connected set
-        cost += min_edge_cost
-        connected_points.add(nearest_point)
-        remaining_points.remove(nearest_point)
+    while len(remaining)>0:
+        # Pick the nearest point to the tree and add its edge cost to the MST cost
+        nearest = min(range(len(remaining)), key=min_edge.__getitem__)
+        cost += min_edge[nearest]
+        row = remaining[nearest] * count
+        remaining[nearest], min_edge[nearest] = remaining[-1], min_edge[-1]
+        remaining.pop()
+        min_edge.pop()
+        # Update the cheapest edges using the edges of the newly added point
+        for i, index in enumerate(remaining):
+            edge_cost = distances[row + index]
+            if edge_cost < min_edge[i]:
+                min_edge[i] = edge_cost
 
     return cost
 
-def strong_heuristic(problem: DungeonProblem, state: DungeonState) -> float:
-    #TODO: ADD YOUR CODE HERE
-#     #IMPORTANT: DO NOT USE "problem.is_goal" HERE.
-#     # Calling it here will mess up the tracking of the explored nodes count
-#     # which is considered the number of is_goal calls during the search
-#     #NOTE: you can use problem.cache() to get a dictionary in which you can store information that will persist between calls of this function
-#     # This could be useful if you want to store the results heavy computations that can be cached and used across multiple calls of this function
-#     # Check if we have already computed the distances (using the cache)
-    remaining_coins = state.remaining_coins
-    player = state.player
-    exit_point = problem.layout.exit
+# Estimates the cost to the goal given the player cell id (y * width + x) and the bitmask of the remaining coins
+# It works for any problem that has a dungeon layout (DungeonProblem or CompactDungeonProblem)
+# Total estimate = distance from the player to the nearest coin + MST of the remaining coins + distance from the closest coin to the exit
+def estimate_remaining_cost(problem: DungeonProblem, player: int, mask: int) -> float:
+    layout = problem.layout
     cache = problem.cache()
+    # The maze distances are the true path lengths between cells (taking the walls into account)
+    # They are computed with one BFS per coin (and one for the exit) the first time they are needed then cached on the problem.
+    # The same tables give the distances between the coins and from the coins to the exit (see "get_coin_distances")
+    # Since they are a metric (like the manhattan distance), the heuristic stays consistent
+    maze_distances = get_maze_distances(problem)
 
     # If no coins remaining, return the distance from player to the exit
-    if len(remaining_coins)==0:
-        return manhattan_distance(player, exit_point)
+    if mask == 0:
+        exit_distance = maze_distances.table(maze_distances.cell(layout.exit))[player]
+        return math.inf if exit_distance == UNREACHABLE else exit_distance
+
+    indices = [index for index in range(len(layout.coins)) if mask >> index & 1]
 
-    # Total heuristic = distance from the player to the nearest coin + MST of the remaining coins + distance from the closest coin to the exit
     # Find the distance from the player to the nearest coin
-    nearest_coin_distance = min(manhattan_distance(player, coin) for coin in remaining_coins)
-    # Calculate an MST of the remaining coins to estimate the minimum path to collect all coins
-    if remaining_coins not in cache:
+    nearest_coin_distance = min(maze_distances.table(maze_distances.cell(layout.coins[index]))[player] for index in indices)
+    if nearest_coin_distance == UNREACHABLE:
+        return math.inf
+    # The MST of the remaining coins (to estimate the minimum path to collect all coins) and the distance from the closest coin to the exit
+    # only depend on the remaining coins so they are cached together for every mask
+    mst_costs = cache.get("mst_costs")
+    if mst_costs is None:
+        mst_costs = cache["mst_costs"] = {}
+    coins_cost = mst_costs.get(mask)
+    if coins_cost is None:
         # If not in cache, calculate it 
-        cache[remaining_coins] = calculate_mst_cost(remaining_coins)
-    mst_cost = cache[remaining_coins]
-    # Find the distance from the closest coin to the exit
-    nearest_exit_distance = min(manhattan_distance(coin, exit_point) for coin in remaining_coins)
+        distances, exit_distances = get_coin_distances(problem)
+        coins_cost = calculate_mst_cost(mask, distances, len(layout.coins)) + min(exit_distances[index] for index in indices)
+        mst_costs[mask] = coins_cost
 
     # Total heuristic value
-    return nearest_coin_distance + mst_cost + nearest_exit_distance
+    return nearest_coin_distance + coins_cost
 
+def strong_heuristic(problem: DungeonProblem, state: DungeonState) -> float:
+    #TODO: ADD YOUR CODE HERE
+#     #IMPORTANT: DO NOT USE "problem.is_goal" HERE.
+#     # Calling it here will mess up the tracking of the explored nodes count
+#     # which is considered the number of is_goal calls during the search
+#     #NOTE: you can use problem.cache() to get a dictionary in which you can store information that will persist between calls of this function
+#     # This could be useful if you want to store the results heavy computations that can be cached and used across multiple calls of this function
+    # The remaining coins are represented by a bitmask which is cheap to hash and is used as the key of the cached MST costs
+    player = state.player.y * problem.layout.width + state.player.x
+    return estimate_remaining_cost(problem, player, state.coin_mask())
@@ -0,0 +1,78 @@
+from typing import Any, Dict, Generic, List, Tuple, TypeVar
+from itertools import count
+import heapq
+
+# S is the state type and T is the type of the data stored alongside each state (e.g. its path or its g-cost)
+S = TypeVar("S")
+T = TypeVar("T")
+
+# The priority frontier is a binary heap with a state -> entry index
+# It is shared by the Uniform Cost, A* and Best First searches and it replaces the old approach
+# of keeping a python list that is re-sorted after every expansion and scanned linearly for duplicates.
+#
+# Decreasing the priority of a state is done by lazy invalidation:
+#   the old heap entry is left in the heap but it is no longer referenced by the index, so it is skipped when popped.
+#
+# Ties are broken by insertion order (FIFO): the key of an entry is the flat tuple (priority, order)
+# where order is the insertion counter of the state. A decrease keeps the order of the state's first insertion
+# (like the old list where a replaced entry kept its place), so the keys never grow and comparing them is O(1).
+class PriorityFrontier(Generic[S, T]):
+    def __init__(self) -> None:
+        self._heap: List[List[Any]] = []          # Heap entries: [key, state, data]
+        self._index: Dict[S, List[Any]] = {}      # The live heap entry of every state in the frontier
+        self._order = count()                     # Insertion counter used for the FIFO tiebreak
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __bool__(self) -> bool:
+        return len(self._index) != 0
+
+    def __contains__(self, state: S) -> bool:
+        return state in self._index
+
+    # Returns the priority of a state in the frontier
+    def priority(self, state: S) -> float:
+        return self._index[state][0][0]
+
+    # Returns the data stored with a state in the frontier
+    def data(self, state: S) -> T:
+        return self._index[state][2]
+
+    # Returns the lowest priority in the frontier without removing its state
+    def min_priority(self) -> float:
+        heap, index = self._heap, self._index
+        # Drop the invalidated entries from the top of the heap
+        while index.get(heap[0][1]) is not heap[0]:
+            heapq.heappop(heap)
+        return heap[0][0][0]
+
+    # Add a new state to the frontier (the state must not be already in the frontier)
+    def push(self, state: S, priority: float, data: T = None) -> None:
+        entry = [(priority, next(self._order)), state, data]
+        self._index[state] = entry
+        heapq.heappush(self._heap, entry)
+
+    # Replace the priority and data of a state in the frontier if the given priority is lower
+    # Returns True if the state was updated
+    def decrease(self, state: S, priority: float, data: T = None) -> bool:
+        old = self._index[state]
+        if priority >= old[0][0]:
+            return False
+        entry = [(priority, old[0][1]), state, data]
+        # The old entry stays in the heap but it is dropped from the index which marks it as invalid
+        self._index[state] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    # Remove the state with the lowest priority from the frontier and return it with its priority and data
+    def pop(self) -> Tuple[S, float, T]:
+        heap, index = self._heap, self._index
+        while True:
+            entry = heapq.heappop(heap)
+            state = entry[1]
+            # Skip the entries that were invalidated by a decrease
+            if index.get(state) is entry:
+                break
+        del index[state]
+        return state, entry[0][0], entry[2]
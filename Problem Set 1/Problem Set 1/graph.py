@@ -1,4 +1,4 @@
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 from dataclasses import dataclass
 import json
 
@@ -46,7 +46,40 @@ class GraphRoutingProblem(Problem[GraphNode, GraphNode]):
     # The cost of an action is the distance between the current node and the next node 
     def get_cost(self, state: GraphNode, action: GraphNode) -> float:
         return euclidean_distance(state.position, action.position)
+
+    # Every neighbor is both the action and the next state
+    def expand(self, state: GraphNode) -> List[Tuple[GraphNode, GraphNode, float]]:
+        position = state.position
+        return [(node, node, euclidean_distance(position, node.position)) for node in self.adjacency.get(state, [])]
     
+    # Returns the predecessors of every node (the adjacency of the graph with all the edges flipped)
+    # It is built once per problem and stored in the problem cache
+    def get_reverse_adjacency(self) -> Dict[GraphNode, List[GraphNode]]:
+        cache = self.cache()
+        reverse_adjacency = cache.get("reverse_adjacency")
+        if reverse_adjacency is None:
+            reverse_adjacency = {node: [] for node in self.adjacency}
+            for node, adjacent in self.adjacency.items():
+                for next_node in adjacent:
+                    reverse_adjacency.setdefault(next_node, []).append(node)
+            # Sort the predecessors by name, similar to the adjacency lists read from the file
+            for predecessors in reverse_adjacency.values():
+                predecessors.sort(key=lambda node: node.name)
+            cache["reverse_adjacency"] = reverse_adjacency
+        return reverse_adjacency
+
+    # Returns the problem of going backward from this problem's goal to the given node on the reversed graph
+    # This is used by the bidirectional search. Since the edge cost is the euclidean distance, it is the same in both directions.
+    def reversed(self, goal: GraphNode) -> 'GraphRoutingProblem':
+        return GraphRoutingProblem(self.goal, goal, self.get_reverse_adjacency())
+
+    # Returns a copy of the problem with another goal
+    # The copy shares the cache of this problem since all the data cached for graph problems does not depend on the goal
+    def with_goal(self, goal: GraphNode) -> 'GraphRoutingProblem':
+        problem = GraphRoutingProblem(self.start, goal, self.adjacency)
+        problem._cache = self.cache()
+        return problem
+
     # Read a graph routing problem from file
     @staticmethod
     def from_file(path: str) -> 'GraphRoutingProblem':
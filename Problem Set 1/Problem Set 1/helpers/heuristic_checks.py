@@ -1,19 +1,112 @@
-from problem import A, S, Problem
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+import multiprocessing as mp
+import random
+from problem import A, S, HeuristicFunction, Problem
 from .utils import add_call_listener
 
 class InconsistentHeuristicException(Exception):
     pass
 
+def _inconsistency_message(state: S, h: float, action: A, c: float, next_state: S, next_h: float) -> str:
+    message = f"State (heuristic = {h}):" + "\n" + str(state) + "\n"
+    message += f"Action: {str(action)} (cost = {c})" + "\n"
+    message += f"Next State (heuristic = {next_h}):" + "\n" + str(next_state) + "\n"
+    message += "Decrease in heuristic exceeds the actions cost\n"
+    message += f"h(state) - h(next state) = {h} - {next_h} = {h - next_h} > {c} (action cost)"
+    return message
+
+# Wraps a successor function to check the consistency of every transition
+# Note: it computes the heuristic of both states on every call, so it is better to use a ConsistencyChecker with the search
 def test_heuristic_consistency(heuristic):
     def listener(next_state: S, problem: Problem[S, A], state: S, action: A):
         h = heuristic(problem, state)
         next_h = heuristic(problem, next_state)
         c = problem.get_cost(state, action)
         if h - next_h > c:
-            message = f"State (heuristic = {h}):" + "\n" + str(state) + "\n"
-            message += f"Action: {str(action)} (cost = {c})" + "\n"
-            message += f"Next State (heuristic = {next_h}):" + "\n" + str(next_state) + "\n"
-            message += "Decrease in heuristic exceeds the actions cost\n"
-            message += f"h(state) - h(next state) = {h} - {next_h} = {h - next_h} > {c} (action cost)"
-            raise InconsistentHeuristicException(message)
-    return add_call_listener(listener)
\ No newline at end of file
+            raise InconsistentHeuristicException(_inconsistency_message(state, h, action, c, next_state, next_h))
+    return add_call_listener(listener)
+
+# Wraps an expand function (see Problem.expand) to check the consistency of every generated edge
+# The successors are returned as a list, so they can be checked before the search iterates over them
+def test_expand_consistency(heuristic):
+    def decorator(expand):
+        def decorated(problem: Problem[S, A], state: S):
+            successors = list(expand(problem, state))
+            h = heuristic(problem, state)
+            for action, next_state, c in successors:
+                next_h = heuristic(problem, next_state)
+                if h - next_h > c:
+                    raise InconsistentHeuristicException(_inconsistency_message(state, h, action, c, next_state, next_h))
+            return successors
+        return decorated
+    return decorator
+
+# An online consistency checker that is given to the informed searches (e.g. AStarSearch(..., checker=ConsistencyChecker()))
+# The search passes the heuristic values it already computed for every generated edge (the parent value is recovered from
+# its priority), so checking does not call the heuristic at all.
+# Only a random subset of the edges is checked: every edge is checked with probability "rate" (1 checks all of them).
+# The tolerance absorbs the rounding errors of recovering h = f - g with non-integer costs.
+class ConsistencyChecker:
+    def __init__(self, rate: float = 1.0, seed: Optional[int] = None, tolerance: float = 1e-9) -> None:
+        self.rate = rate
+        self.tolerance = tolerance
+        self.random = random.Random(seed)
+        self.checked = 0    # The number of checked edges
+
+    # Check the edge (state --action--> next_state) given the heuristic values of both states and the action cost
+    def check(self, state: S, h: float, action: A, c: float, next_state: S, next_h: float) -> None:
+        if self.rate < 1 and self.random.random() >= self.rate: return
+        self.checked += 1
+        if h - next_h > c + self.tolerance:
+            raise InconsistentHeuristicException(_inconsistency_message(state, h, action, c, next_state, next_h))
+
+# The problem and heuristic of the offline check workers (they are sent once when the worker starts)
+_worker_problem: Optional[Problem] = None
+_worker_heuristic: Optional[HeuristicFunction] = None
+
+def _init_worker(problem: Problem, heuristic: HeuristicFunction) -> None:
+    global _worker_problem, _worker_heuristic
+    _worker_problem, _worker_heuristic = problem, heuristic
+
+def _evaluate_batch(states: List[Any]) -> List[float]:
+    return [_worker_heuristic(_worker_problem, state) for state in states]
+
+# An offline consistency check over the full state graph reachable from the initial state
+# The states and edges are enumerated first, then the heuristic of every state is computed once in parallel batches
+# (using "workers" processes, or in the current process if workers <= 1) and finally every edge is checked.
+# The problem, the heuristic and the states must be picklable if workers > 1 (the heuristic must be defined at the top level of a module).
+# It raises an InconsistentHeuristicException at the first inconsistent edge, otherwise it returns the number of checked edges.
+# It also checks that the heuristic of every goal is 0 if "check_goals" is True.
+def verify_consistency(problem: Problem[S, A], heuristic: HeuristicFunction, workers: int = 1, batch_size: int = 1024,
+                       initial_state: Optional[S] = None, check_goals: bool = True) -> int:
+    if initial_state is None: initial_state = problem.get_initial_state()
+    # Enumerate the reachable states using a breadth first traversal
+    index: Dict[S, int] = {initial_state: 0}
+    states: List[S] = [initial_state]
+    edges: List[Tuple[int, A, int, float]] = []     # Every edge as (state index, action, next state index, action cost)
+    queue = deque([initial_state])
+    while queue:
+        state = queue.popleft()
+        for action, next_state, c in problem.expand(state):
+            if next_state not in index:
+                index[next_state] = len(states)
+                states.append(next_state)
+                queue.append(next_state)
+            edges.append((index[state], action, index[next_state], c))
+    # Compute the heuristic of every state in batches
+    batches = [states[start:start+batch_size] for start in range(0, len(states), batch_size)]
+    if workers > 1:
+        with mp.get_context().Pool(workers, initializer=_init_worker, initargs=(problem, heuristic)) as pool:
+            values = [h for batch in pool.imap(_evaluate_batch, batches) for h in batch]
+    else:
+        values = [heuristic(problem, state) for state in states]
+    for source, action, target, c in edges:
+        h, next_h = values[source], values[target]
+        if h - next_h > c:
+            raise InconsistentHeuristicException(_inconsistency_message(states[source], h, action, c, states[target], next_h))
+    if check_goals:
+        for state, h in zip(states, values):
+            if h != 0 and problem.is_goal(state):
+                raise InconsistentHeuristicException(f"Expected Heuristic at goal to be 0, got {h}" + "\nGoal State:\n" + str(state))
+    return len(edges)
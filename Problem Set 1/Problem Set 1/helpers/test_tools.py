@@ -4,7 +4,7 @@ from graph import GraphRoutingProblem, graphrouting_heuristic
 from dungeon import DungeonProblem, Direction
 from problem import A, S, Problem
 from .utils import Result, fetch_recorded_calls, fetch_tracked_call_count, load_function
-from .heuristic_checks import InconsistentHeuristicException, test_heuristic_consistency
+from .heuristic_checks import InconsistentHeuristicException, test_expand_consistency
 from functools import lru_cache
 import time
 
@@ -120,8 +120,9 @@ def test_dungeon_heuristic(
     problem: DungeonProblem) -> Tuple[float, int, str, float]:
     fetch_tracked_call_count(DungeonProblem.is_goal)
     heuristic = lru_cache(2**16)(load_function("dungeon_heuristic.strong_heuristic"))
-    original_get_successor = DungeonProblem.get_successor
-    DungeonProblem.get_successor = test_heuristic_consistency(heuristic)(DungeonProblem.get_successor)
+    # The searches generate the edges with "expand", so only it is wrapped (the heuristic is computed once per state and edge)
+    original_expand = DungeonProblem.expand
+    DungeonProblem.expand = test_expand_consistency(heuristic)(DungeonProblem.expand)
     search_fn = load_function(function_path)
     initial_state = problem.get_initial_state()
     message = ""
@@ -132,7 +133,7 @@ def test_dungeon_heuristic(
         message = "Heuristic is inconsistent:\n" + str(err)
         return None, 1e10, message, 0
     finally:
-        DungeonProblem.get_successor = original_get_successor
+        DungeonProblem.expand = original_expand
     elapsed = time.time() - start
     explored = fetch_tracked_call_count(DungeonProblem.is_goal)
     path_cost = None
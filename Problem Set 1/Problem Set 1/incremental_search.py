@@ -0,0 +1,225 @@
+from typing import Dict, List, Optional, Set, Tuple
+import heapq
+import math
+
+from agents import GoalBasedAgent
+from compact_dungeon import CompactDungeonState
+from dungeon import DungeonLayout, DungeonProblem, DungeonState
+from mathutils import Direction, Point
+
+# This file contains an incremental planner for the dungeon problem based on D* Lite.
+# D* Lite searches backward from the goal (the exit with no remaining coins) to the current state of the agent,
+# so when the cost of some cells changes (e.g. a wall is added or removed), only the states whose cost to the goal
+# is affected are repaired, and when the agent moves, the search tree stays valid (its root is the goal).
+# The states are the compact states (player cell, coin mask) where cell = y * width + x (see "compact_dungeon.py").
+#
+# Every state has two values:
+#   g: the cost to the goal found by the last expansion of the state
+#   rhs: the one-step lookahead value min over the successors s' of (c(s, s') + g(s')) (0 for the goal)
+# A state is consistent if g == rhs. The inconsistent states are stored in a priority queue with the key
+#   (min(g, rhs) + h(start, s) + km, min(g, rhs))
+# where h is a lower bound on the cost from the start to the state built from manhattan distances (see "_h")
+# and km accumulates the heuristic distance travelled by the agent between changes (so the old keys stay lower bounds).
+#
+# The cost of moving into a cell is the cost of the cell (1 for the floor) and it is infinite if any of the two cells is a wall.
+# The cell costs must be at least 1 to keep the heuristic admissible.
+class DStarLite:
+    def __init__(self, layout: DungeonLayout) -> None:
+        self.width, self.height = layout.width, layout.height
+        size = layout.width * layout.height
+        self.costs: List[float] = [math.inf] * size     # The cost of moving into every cell (inf for the walls)
+        for point in layout.walkable:
+            self.costs[point.y * self.width + point.x] = 1
+        # neighbors[cell] contains (direction, neighbor cell) for every direction that stays inside the grid
+        self.neighbors: List[List[Tuple[Direction, int]]] = [[] for _ in range(size)]
+        for cell in range(size):
+            x, y = cell % self.width, cell // self.width
+            for direction in Direction:
+                vector = direction.to_vector()
+                if 0 <= x + vector.x < self.width and 0 <= y + vector.y < self.height:
+                    self.neighbors[cell].append((direction, cell + vector.y * self.width + vector.x))
+        self.coin_bits: List[int] = [0] * size
+        for coin, bit in layout.coin_bits.items():
+            self.coin_bits[coin.y * self.width + coin.x] = bit
+        self.coins = layout.coins
+        self.goal: CompactDungeonState = (layout.exit.y * self.width + layout.exit.x, 0)
+        self.g: Dict[CompactDungeonState, float] = {}
+        self.rhs: Dict[CompactDungeonState, float] = {self.goal: 0}
+        self.known: Dict[int, Set[int]] = {self.goal[0]: {0}}   # The masks of the states that have a g or rhs value, by cell
+        self.queue: List[Tuple[Tuple[float, float], int, CompactDungeonState]] = []
+        self.keys: Dict[CompactDungeonState, Tuple[float, float]] = {}  # The key of every state in the queue (the other heap entries are stale)
+        self.counter = 0
+        self.km = 0
+        self.start: Optional[CompactDungeonState] = None
+        self.last_start: Optional[CompactDungeonState] = None
+        self.expanded = 0                                   # The number of expansions done by all the plans
+        self._push(self.goal, (0, 0))
+
+    # Returns a lower bound on the cost from a state to another state (where the player collected some coins)
+    # The player must visit every collected coin on the way, so the bound is the largest manhattan distance
+    # from the first player cell to the second one through any collected coin (or directly if no coin was collected).
+    # It satisfies the triangle inequality, which keeps the keys consistent when km is updated.
+    def _h(self, state: CompactDungeonState, other: CompactDungeonState) -> int:
+        width = self.width
+        (y1, x1), (y2, x2) = divmod(state[0], width), divmod(other[0], width)
+        bound = abs(x1 - x2) + abs(y1 - y2)
+        collected = state[1] & ~other[1]
+        if collected:
+            for coin in self.coin_points(collected):
+                distance = abs(x1 - coin.x) + abs(y1 - coin.y) + abs(coin.x - x2) + abs(coin.y - y2)
+                if distance > bound: bound = distance
+        return bound
+
+    # Returns the points of the coins in the mask
+    def coin_points(self, mask: int) -> List[Point]:
+        return [coin for index, coin in enumerate(self.coins) if mask >> index & 1]
+
+    def _key(self, state: CompactDungeonState) -> Tuple[float, float]:
+        value = min(self.g.get(state, math.inf), self.rhs.get(state, math.inf))
+        return (value + self._h(self.start, state) + self.km, value)
+
+    def _push(self, state: CompactDungeonState, key: Tuple[float, float]) -> None:
+        self.keys[state] = key
+        self.counter += 1
+        heapq.heappush(self.queue, (key, self.counter, state))
+
+    # Drop the stale entries from the top of the queue and return the top key (inf if the queue is empty)
+    def _top_key(self) -> Tuple[float, float]:
+        queue, keys = self.queue, self.keys
+        while queue and keys.get(queue[0][2]) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else (math.inf, math.inf)
+
+    # Returns the cost of moving from a cell to a neighbor cell
+    def _cost(self, cell: int, neighbor: int) -> float:
+        return math.inf if self.costs[cell] == math.inf else self.costs[neighbor]
+
+    # Returns the (direction, successor) pairs of a state (the moves into walls are skipped)
+    def successors(self, state: CompactDungeonState) -> List[Tuple[Direction, CompactDungeonState]]:
+        cell, mask = state
+        if self.costs[cell] == math.inf: return []
+        coin_bits = self.coin_bits
+        return [(direction, (neighbor, mask & ~coin_bits[neighbor])) for direction, neighbor in self.neighbors[cell] if self.costs[neighbor] != math.inf]
+
+    # Returns the predecessors of a state: the player came from a neighbor cell with the same coins
+    # or, if the cell has a coin, with this coin too (it was collected by entering the cell).
+    # A state where the player stands on a remaining coin has no predecessor.
+    def predecessors(self, state: CompactDungeonState) -> List[CompactDungeonState]:
+        cell, mask = state
+        bit = self.coin_bits[cell]
+        if mask & bit or self.costs[cell] == math.inf: return []
+        masks = (mask, mask | bit) if bit else (mask,)
+        coin_bits = self.coin_bits
+        return [(neighbor, previous) for _, neighbor in self.neighbors[cell] if self.costs[neighbor] != math.inf
+                for previous in masks if not previous & coin_bits[neighbor]]
+
+    # Recompute the rhs value of a state and put it in the queue if it is inconsistent
+    def _update(self, state: CompactDungeonState) -> None:
+        if state != self.goal:
+            g = self.g
+            self.rhs[state] = min((self._cost(state[0], successor[0]) + g.get(successor, math.inf) for _, successor in self.successors(state)), default=math.inf)
+            self.known.setdefault(state[0], set()).add(state[1])
+        self.keys.pop(state, None)
+        if self.g.get(state, math.inf) != self.rhs.get(state, math.inf):
+            self._push(state, self._key(state))
+
+    # Expand the inconsistent states until the start state is consistent and no state in the queue can improve it
+    def compute_shortest_path(self) -> None:
+        start, g, rhs = self.start, self.g, self.rhs
+        while self._top_key() < self._key(start) or rhs.get(start, math.inf) != g.get(start, math.inf):
+            old_key, _, state = heapq.heappop(self.queue)
+            del self.keys[state]
+            new_key = self._key(state)
+            if old_key < new_key:
+                # The key was computed before the agent moved, so the state is reinserted with its current key
+                self._push(state, new_key)
+                continue
+            self.expanded += 1
+            if g.get(state, math.inf) > rhs.get(state, math.inf):
+                # The state is overconsistent: its cost to the goal decreased
+                g[state] = rhs[state]
+                self.known.setdefault(state[0], set()).add(state[1])
+                for predecessor in self.predecessors(state):
+                    self._update(predecessor)
+            else:
+                # The state is underconsistent: its cost to the goal increased
+                g[state] = math.inf
+                for predecessor in self.predecessors(state):
+                    self._update(predecessor)
+                self._update(state)
+
+    # Move the start of the plan to the given state (the current state of the agent)
+    def set_start(self, state: CompactDungeonState) -> None:
+        if self.start is None:
+            self.last_start = state
+        self.start = state
+
+    # Change the cost of moving into a cell (math.inf to make it a wall and 1 to make it a floor)
+    # The start must be the current state of the agent (see "set_start") before the changes are applied.
+    # Only the states that were already reached by the search and whose outgoing moves go into or out of the cell are updated.
+    def set_cell_cost(self, point: Point, cost: float) -> None:
+        cell = point.y * self.width + point.x
+        if self.costs[cell] == cost: return
+        # The keys in the queue were computed from the last start, so km keeps them lower bounds for the new start
+        if self.start is not None and self.last_start is not None:
+            self.km += self._h(self.last_start, self.start)
+            self.last_start = self.start
+        self.costs[cell] = cost
+        coin_bits = self.coin_bits
+        for _, neighbor in self.neighbors[cell]:
+            for mask in list(self.known.get(neighbor, ())):
+                # The move from the neighbor into the cell changed
+                self._update((neighbor, mask))
+                # The moves from the cell into the neighbor changed
+                for previous in {mask, mask | coin_bits[neighbor]}:
+                    if not previous & coin_bits[cell] and previous & ~coin_bits[neighbor] == mask:
+                        self._update((cell, previous))
+        for mask in list(self.known.get(cell, ())):
+            self._update((cell, mask))
+
+    # Returns the cost to the goal of a state (inf if the goal cannot be reached) after the last plan
+    def cost(self, state: CompactDungeonState) -> float:
+        return self.g.get(state, math.inf)
+
+    # Returns the best move from the start (or None if the goal cannot be reached)
+    def best_action(self) -> Optional[Direction]:
+        start = self.start
+        if self.rhs.get(start, math.inf) == math.inf: return None
+        g = self.g
+        return min(self.successors(start), key=lambda pair: self._cost(start[0], pair[1][0]) + g.get(pair[1], math.inf), default=(None, None))[0]
+
+# This agent plans with D* Lite and replans incrementally when the layout changes
+# The layout change is detected automatically by comparing the walkable cells of the layout given to "act" with the last one,
+# so the agent can be given a new DungeonProblem (with the same size, coins and exit) after a wall is added or removed.
+# Other cost changes can be given to the planner directly using "set_cell_cost".
+# If the size, the coins or the exit of the layout change, the agent plans from scratch.
+class DStarLiteAgent(GoalBasedAgent[DungeonState, Direction]):
+    def __init__(self) -> None:
+        super().__init__()
+        self.planner: Optional[DStarLite] = None
+        self.layout: Optional[DungeonLayout] = None
+
+    # Returns the cell cost changes between the last layout and the given one
+    # (or None if they are not compatible, in which case a new planner is needed)
+    def _layout_changes(self, layout: DungeonLayout) -> Optional[List[Tuple[Point, float]]]:
+        old = self.layout
+        if old is None or (old.width, old.height, old.exit, old.coins) != (layout.width, layout.height, layout.exit, layout.coins):
+            return None
+        return [(point, math.inf) for point in old.walkable - layout.walkable] + [(point, 1) for point in layout.walkable - old.walkable]
+
+    def act(self, problem: DungeonProblem, state: DungeonState) -> Direction:
+        layout = problem.layout
+        changes = []
+        if layout is not self.layout:
+            changes = self._layout_changes(layout)
+            if changes is None:
+                self.planner = DStarLite(layout)
+                changes = []
+            self.layout = layout
+        planner = self.planner
+        # The start must be moved before applying the changes so that the updated states get keys for the current state
+        planner.set_start((state.player.y * planner.width + state.player.x, layout.coin_mask(state.remaining_coins)))
+        for point, cost in changes:
+            planner.set_cell_cost(point, cost)
+        planner.compute_shortest_path()
+        return planner.best_action()
@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+
+from dungeon import DungeonLayout, DungeonProblem, DungeonState
+from mathutils import Direction, Point
+from problem import Solution
+
+# Jump Point Search (JPS) finds a shortest path between two cells of a dungeon layout (a 4-connected grid with unit costs).
+# On such grids, many shortest paths are symmetric (they take the same moves in a different order), so A* expands most of them.
+# JPS only keeps one canonical path: from every node, it "jumps" in a straight line and only stops at the jump points
+# (the target or a cell where another canonical path could start), so the open rooms are crossed without adding their cells to the frontier.
+# This is the 4-connected variant where the vertical moves play the role of the diagonal moves of the 8-connected JPS:
+#   - A horizontal jump stops at the target or at a cell with a forced neighbor
+#     (an open cell above or below whose counterpart behind the cell is a wall).
+#   - A vertical jump stops at the target, at a cell with a forced neighbor (left or right)
+#     or at a cell from which a horizontal jump (in either direction) finds a jump point.
+#   - After a horizontal move, the successors are the horizontal jump forward and both vertical jumps.
+#     After a vertical move, they are the vertical jump forward and both horizontal jumps.
+# The jump points are searched with A* using the manhattan distance (the cost of a jump is its length).
+#
+# The grid is padded with a border of walls so the jumps never need to check the bounds.
+# Every cell is identified by its padded id: (y + 1) * stride + (x + 1) where stride = width + 2.
+class JumpPointSearch:
+    __slots__ = ("width", "height", "stride", "walkable", "distances", "expanded")
+
+    def __init__(self, layout: DungeonLayout) -> None:
+        self.width = layout.width
+        self.height = layout.height
+        self.stride = layout.width + 2
+        self.walkable = bytearray(self.stride * (layout.height + 2))
+        for point in layout.walkable:
+            self.walkable[self.cell(point)] = 1
+        # The distances between the pairs of cells that were queried so far
+        self.distances: Dict[Tuple[int, int], float] = {}
+        # The number of jump points expanded by all the searches (to compare with the nodes expanded by A*)
+        self.expanded = 0
+
+    # Returns the padded id of the cell at the given point
+    def cell(self, point: Point) -> int:
+        return (point.y + 1) * self.stride + point.x + 1
+
+    # Returns the point of the given padded cell id
+    def point(self, cell: int) -> Point:
+        y, x = divmod(cell, self.stride)
+        return Point(x - 1, y - 1)
+
+    # Jump horizontally from the cell by the step (+1 or -1) and return the jump point (or -1 if a wall is hit first)
+    def _jump_horizontal(self, cell: int, step: int, goal: int) -> int:
+        walkable, stride = self.walkable, self.stride
+        while True:
+            cell += step
+            if not walkable[cell]: return -1
+            if cell == goal: return cell
+            behind = cell - step
+            if (walkable[cell - stride] and not walkable[behind - stride]) or (walkable[cell + stride] and not walkable[behind + stride]):
+                return cell
+
+    # Jump vertically from the cell by the step (+stride or -stride) and return the jump point (or -1 if a wall is hit first)
+    def _jump_vertical(self, cell: int, step: int, goal: int) -> int:
+        walkable = self.walkable
+        while True:
+            cell += step
+            if not walkable[cell]: return -1
+            if cell == goal: return cell
+            behind = cell - step
+            if (walkable[cell - 1] and not walkable[behind - 1]) or (walkable[cell + 1] and not walkable[behind + 1]):
+                return cell
+            if self._jump_horizontal(cell, 1, goal) >= 0 or self._jump_horizontal(cell, -1, goal) >= 0:
+                return cell
+
+    # Returns the length of a straight jump between two cells (the number of moves)
+    def _length(self, cell: int, next_cell: int) -> int:
+        delta = abs(next_cell - cell)
+        return delta if delta < self.stride else delta // self.stride
+
+    # Returns the list of jump points from the source to the target (both included) or None if there is no path
+    def jump_points(self, source: Point, target: Point) -> Optional[List[int]]:
+        start, goal = self.cell(source), self.cell(target)
+        walkable, stride = self.walkable, self.stride
+        if not walkable[start] or not walkable[goal]: return None
+        goal_y, goal_x = divmod(goal, stride)
+        def heuristic(cell: int) -> int:
+            y, x = divmod(cell, stride)
+            return abs(x - goal_x) + abs(y - goal_y)
+        g_values = {start: 0}
+        parents = {start: -1}
+        frontier = [(heuristic(start), 0, start)]
+        while frontier:
+            _, g, cell = heapq.heappop(frontier)
+            if g > g_values[cell]: continue
+            if cell == goal:
+                points = []
+                while cell != -1:
+                    points.append(cell)
+                    cell = parents[cell]
+                points.reverse()
+                return points
+            self.expanded += 1
+            # Choose the directions to jump to using the direction of the move that reached the cell
+            parent = parents[cell]
+            if parent == -1:
+                steps = (1, -1, stride, -stride)
+            elif abs(cell - parent) < stride:
+                forward = 1 if cell > parent else -1
+                steps = (forward, stride, -stride)
+            else:
+                forward = stride if cell > parent else -stride
+                steps = (forward, 1, -1)
+            for step in steps:
+                if step == 1 or step == -1:
+                    jump = self._jump_horizontal(cell, step, goal)
+                else:
+                    jump = self._jump_vertical(cell, step, goal)
+                if jump < 0: continue
+                jump_g = g + self._length(cell, jump)
+                if jump_g < g_values.get(jump, math.inf):
+                    g_values[jump] = jump_g
+                    parents[jump] = cell
+                    heapq.heappush(frontier, (jump_g + heuristic(jump), jump_g, jump))
+        return None
+
+    # Returns the directions of a shortest path from the source to the target (or None if there is no path)
+    def path(self, source: Point, target: Point) -> Optional[List[Direction]]:
+        points = self.jump_points(source, target)
+        if points is None: return None
+        stride = self.stride
+        directions = []
+        for cell, next_cell in zip(points, points[1:]):
+            if abs(next_cell - cell) < stride:
+                direction = Direction.RIGHT if next_cell > cell else Direction.LEFT
+            else:
+                direction = Direction.DOWN if next_cell > cell else Direction.UP
+            directions.extend([direction] * self._length(cell, next_cell))
+        return directions
+
+    # Returns the maze distance between two points (infinity if there is no path between them)
+    # The distances are cached (the moves are reversible, so the distance from a to b is the same as from b to a)
+    def distance(self, source: Point, target: Point) -> float:
+        start, goal = self.cell(source), self.cell(target)
+        key = (start, goal) if start <= goal else (goal, start)
+        distance = self.distances.get(key)
+        if distance is None:
+            points = self.jump_points(source, target)
+            distance = math.inf
+            if points is not None:
+                distance = sum(self._length(cell, next_cell) for cell, next_cell in zip(points, points[1:]))
+            self.distances[key] = distance
+        return distance
+
+# Returns the jump point search of the problem's layout
+# It is created once per problem and stored in the problem cache so that its cached distances persist between calls
+def get_jump_point_search(problem: DungeonProblem) -> JumpPointSearch:
+    cache = problem.cache()
+    jps = cache.get("jump_point_search")
+    if jps is None:
+        jps = cache["jump_point_search"] = JumpPointSearch(problem.layout)
+    return jps
+
+# A fast (but not optimal) dungeon solver that chains single-target legs found by the jump point search:
+# it repeatedly walks to the nearest remaining coin (by maze distance), then walks to the exit.
+# The coins collected on the way to another coin are removed too. It returns None if a coin or the exit cannot be reached.
+def JumpPointLegsSearch(problem: DungeonProblem, initial_state: DungeonState) -> Solution:
+    jps = get_jump_point_search(problem)
+    player, remaining = initial_state.player, set(initial_state.remaining_coins)
+    solution = []
+    while True:
+        if remaining:
+            target = min(remaining, key=lambda coin: (jps.distance(player, coin), coin.y, coin.x))
+        else:
+            target = problem.layout.exit
+        leg = jps.path(player, target)
+        if leg is None: return None
+        for direction in leg:
+            player = player + direction.to_vector()
+            remaining.discard(player)
+        solution.extend(leg)
+        if target == problem.layout.exit and not remaining:
+            return solution
@@ -0,0 +1,151 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+import os
+
+from graph import GraphNode, GraphRoutingProblem, graphrouting_heuristic
+from persistence import cache_path, fingerprint, load_arrays, read_header, save_arrays
+
+# The default number of landmarks
+DEFAULT_LANDMARK_COUNT = 8
+
+# This file contains the ALT (A*, Landmarks and Triangle inequality) heuristic for the graph routing problem.
+# A few nodes are selected as landmarks and the exact distances from and to every landmark are precomputed with Dijkstra.
+# Since the graph is directed, for every landmark L, node v and goal t, the triangle inequality gives two lower bounds on d(v, t):
+#   d(v, t) >= d(v, L) - d(t, L)        (using the distances to the landmark)
+#   d(v, t) >= d(L, t) - d(L, v)        (using the distances from the landmark)
+# The heuristic is the maximum of these bounds and the euclidean distance, so it is admissible and consistent.
+
+# The precomputed landmark distances. Every node is identified by its index in the problem's adjacency (in the order of the file)
+class Landmarks:
+    __slots__ = ("landmarks", "forward", "backward")
+
+    def __init__(self, landmarks: array, forward: List[array], backward: List[array]) -> None:
+        self.landmarks = landmarks      # The node index of every landmark
+        self.forward = forward          # forward[i][v] is the distance from the landmark 'i' to the node 'v' (inf if unreachable)
+        self.backward = backward        # backward[i][v] is the distance from the node 'v' to the landmark 'i' (inf if unreachable)
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    # Returns the landmark lower bound on the distance from a node to another (given their indices)
+    def lower_bound(self, node: int, goal: int) -> float:
+        bound = 0
+        for forward, backward in zip(self.forward, self.backward):
+            # If both distances are infinite, the bound is undefined (nan) and the comparison skips it
+            estimate = backward[node] - backward[goal]
+            if estimate > bound: bound = estimate
+            estimate = forward[goal] - forward[node]
+            if estimate > bound: bound = estimate
+        return bound
+
+# Returns the list of nodes and the successors of every node as (node index, cost) pairs
+# They are built once per problem and stored in the problem cache
+def get_indexed_graph(problem: GraphRoutingProblem) -> Tuple[List[GraphNode], Dict[GraphNode, int], List[List[Tuple[int, float]]]]:
+    cache = problem.cache()
+    graph = cache.get("indexed_graph")
+    if graph is None:
+        nodes = list(problem.adjacency)
+        indices = {node: index for index, node in enumerate(nodes)}
+        for adjacent in problem.adjacency.values():
+            for node in adjacent:
+                if node not in indices:
+                    indices[node] = len(nodes)
+                    nodes.append(node)
+        successors = [
+            [(indices[next_node], problem.get_cost(node, next_node)) for next_node in problem.get_actions(node)]
+            for node in nodes
+        ]
+        graph = cache["indexed_graph"] = (nodes, indices, successors)
+    return graph
+
+# Returns the distances from the source to every node using Dijkstra on the given successors
+def _dijkstra(successors: List[List[Tuple[int, float]]], source: int) -> array:
+    distances = array('d', [math.inf]) * len(successors)
+    distances[source] = 0
+    queue = [(0, source)]
+    while queue:
+        distance, node = heapq.heappop(queue)
+        if distance > distances[node]: continue
+        for next_node, cost in successors[node]:
+            next_distance = distance + cost
+            if next_distance < distances[next_node]:
+                distances[next_node] = next_distance
+                heapq.heappush(queue, (next_distance, next_node))
+    return distances
+
+# Select the landmarks using farthest-point selection and compute their distance tables
+# The first landmark is the farthest node from the first node, then every new landmark is the node that maximizes
+# the distance from its closest landmark (the nodes that cannot be reached from any landmark are picked first)
+def build_landmarks(problem: GraphRoutingProblem, count: int = DEFAULT_LANDMARK_COUNT) -> Landmarks:
+    nodes, _, successors = get_indexed_graph(problem)
+    predecessors: List[List[Tuple[int, float]]] = [[] for _ in nodes]
+    for node, adjacent in enumerate(successors):
+        for next_node, cost in adjacent:
+            predecessors[next_node].append((node, cost))
+    landmarks, forward, backward = array('l'), [], []
+    if not nodes: return Landmarks(landmarks, forward, backward)
+    closest = _dijkstra(successors, 0)
+    closest[0] = -1
+    for _ in range(min(count, len(nodes))):
+        landmark = max(range(len(nodes)), key=closest.__getitem__)
+        landmarks.append(landmark)
+        forward.append(_dijkstra(successors, landmark))
+        backward.append(_dijkstra(predecessors, landmark))
+        if len(landmarks) == 1:
+            closest = array('d', forward[0])
+        else:
+            for node, distance in enumerate(forward[-1]):
+                if distance < closest[node]: closest[node] = distance
+        for landmark in landmarks:
+            closest[landmark] = -1
+    return Landmarks(landmarks, forward, backward)
+
+# Returns a key that identifies the graph (node names, positions and edges)
+def graph_fingerprint(problem: GraphRoutingProblem) -> str:
+    nodes, _, successors = get_indexed_graph(problem)
+    return fingerprint(
+        "graph",
+        [(node.name, node.position.x, node.position.y) for node in nodes],
+        [[next_node for next_node, _ in adjacent] for adjacent in successors]
+    )
+
+# Returns the path of the landmark file stored next to a graph file
+def landmarks_path(graph_path: str) -> str:
+    return os.path.splitext(graph_path)[0] + ".landmarks.bin"
+
+# Returns the landmarks of the problem
+# If the path of the graph file is given, the landmarks are stored next to it, otherwise they are stored in the cache directory.
+# The file is only reused if it was built for the same graph and the same number of landmarks, otherwise the landmarks are rebuilt.
+# They are also stored in the problem cache so they are only loaded once per problem.
+# If the count is not given, the landmarks already stored in the problem cache are returned (or the default count is used)
+# A ValueError is raised if the count is less than 1
+def get_landmarks(problem: GraphRoutingProblem, count: Optional[int] = None, graph_path: Optional[str] = None) -> Landmarks:
+    if count is not None and count < 1:
+        raise ValueError(f"The number of landmarks must be at least 1 (got {count})")
+    cache = problem.cache()
+    landmarks = cache.get("landmarks")
+    if landmarks is None or (count is not None and cache["landmark_count"] != count):
+        if count is None: count = DEFAULT_LANDMARK_COUNT
+        key = graph_fingerprint(problem)
+        path = landmarks_path(graph_path) if graph_path else cache_path("landmarks", key)
+        metadata = {"fingerprint": key, "count": count}
+        if os.path.exists(path) and read_header(path)[0]["metadata"] == metadata:
+            arrays = load_arrays(path)
+            size = len(arrays["landmarks"])
+            landmarks = Landmarks(arrays["landmarks"], [arrays[f"forward{i}"] for i in range(size)], [arrays[f"backward{i}"] for i in range(size)])
+        else:
+            landmarks = build_landmarks(problem, count)
+            arrays = {"landmarks": landmarks.landmarks}
+            arrays.update((f"forward{i}", distances) for i, distances in enumerate(landmarks.forward))
+            arrays.update((f"backward{i}", distances) for i, distances in enumerate(landmarks.backward))
+            save_arrays(path, arrays, metadata)
+        cache["landmarks"] = landmarks
+        cache["landmark_count"] = count
+    return landmarks
+
+def landmark_heuristic(problem: GraphRoutingProblem, state: GraphNode) -> float:
+    _, indices, _ = get_indexed_graph(problem)
+    bound = get_landmarks(problem).lower_bound(indices[state], indices[problem.goal])
+    return max(bound, graphrouting_heuristic(problem, state))
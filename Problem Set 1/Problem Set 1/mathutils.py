@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Iterator
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
 import math
 
 # the class Point will hold a 2D coordinate on a discrete grid
@@ -32,6 +33,11 @@ class Point:
     def __iter__(self) -> Iterator[int]:
         return iter((self.x, self.y))
 
+    # The default pickling of frozen dataclasses with __slots__ fails (it assigns the fields directly),
+    # so we rebuild the point from its coordinates. This is needed to send points to other processes
+    def __reduce__(self):
+        return (Point, (self.x, self.y))
+
 # This is a helper function to compute the manhattan distance between 2 points
 def manhattan_distance(p1: Point, p2: Point) -> int:
     return abs(p1.x - p2.x) + abs(p1.y - p2.y)
@@ -75,4 +81,49 @@ Direction._Vectors = [
     Point( 0, -1),
     Point(-1,  0),
     Point( 0,  1)
-]
\ No newline at end of file
+]
+
+# A flyweight table of the points of a width x height grid
+# Every point is created once and shared (points[y * width + x] is the point (x, y)), and the neighbor of every point
+# in every direction is precomputed, so moving on the grid is a table lookup instead of creating a new Point:
+#   neighbors[direction][cell] is the point next to the cell in this direction (None if it is outside the grid)
+# The points are ordinary Points, so they can be mixed with the points created elsewhere (they are equal and have the same hash).
+class PointGrid:
+    __slots__ = ("width", "height", "points", "neighbors", "directions")
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.points: List[Point] = [Point(x, y) for y in range(height) for x in range(width)]
+        self.neighbors: List[List[Optional[Point]]] = []
+        for direction in Direction:
+            dx, dy = direction.to_vector()
+            self.neighbors.append([
+                self.points[(y + dy) * width + x + dx] if 0 <= x + dx < width and 0 <= y + dy < height else None
+                for y in range(height) for x in range(width)
+            ])
+        # The (direction, neighbor table) pairs in Direction order, to move from a cell in every direction
+        self.directions: List[Tuple[Direction, List[Optional[Point]]]] = list(zip(Direction, self.neighbors))
+
+    # Returns the cell id of a point (which must be inside the grid)
+    def cell(self, point: Point) -> int:
+        return point.y * self.width + point.x
+
+    # Returns the shared point at the given coordinates
+    def point(self, x: int, y: int) -> Point:
+        return self.points[y * self.width + x]
+
+    # Returns the shared point equal to the given point (or the point itself if it is outside the grid)
+    def intern(self, point: Point) -> Point:
+        x, y = point
+        return self.points[y * self.width + x] if 0 <= x < self.width and 0 <= y < self.height else point
+
+    # Returns the point next to the given point in the given direction (None if it is outside the grid)
+    def neighbor(self, point: Point, direction: Direction) -> Optional[Point]:
+        return self.neighbors[direction][point.y * self.width + point.x]
+
+# Returns the point grid of the given size
+# The grids are shared between all the problems with the same size
+@lru_cache(maxsize=32)
+def get_point_grid(width: int, height: int) -> PointGrid:
+    return PointGrid(width, height)
\ No newline at end of file
@@ -0,0 +1,73 @@
+from array import array
+from collections import deque
+from typing import Dict, List
+import math
+
+from dungeon import DungeonLayout, DungeonProblem
+from mathutils import Direction, Point
+
+# The value stored in the distance tables for the cells that cannot be reached from the source
+UNREACHABLE = 0xFFFF
+
+# The maze distance oracle returns the true shortest path length (taking walls into account) between two cells of a dungeon layout.
+# Every cell is identified by its id: y * width + x.
+# The distances from a source cell to every other cell are computed lazily with one BFS the first time the source is queried,
+# then they are stored in a flat array('H') (2 bytes per cell) indexed by the cell id.
+# Since moving is reversible and all the moves cost 1, the distance from a to b is the same as the distance from b to a.
+class MazeDistances:
+    __slots__ = ("width", "height", "walkable", "neighbors", "tables")
+
+    def __init__(self, layout: DungeonLayout) -> None:
+        self.width = layout.width
+        self.height = layout.height
+        # walkable[cell] is 1 if the cell is not a wall
+        self.walkable = bytearray(layout.width * layout.height)
+        for point in layout.walkable:
+            self.walkable[self.cell(point)] = 1
+        # neighbors[cell] contains the walkable cells that can be reached from the cell in one move (in the order of Direction)
+        vectors = [direction.to_vector() for direction in Direction]
+        self.neighbors: List[List[int]] = [[] for _ in range(len(self.walkable))]
+        for point in layout.walkable:
+            cell = self.cell(point)
+            for vector in vectors:
+                x, y = point.x + vector.x, point.y + vector.y
+                if 0 <= x < self.width and 0 <= y < self.height and self.walkable[y * self.width + x]:
+                    self.neighbors[cell].append(y * self.width + x)
+        # The distance tables of the sources that were queried so far
+        self.tables: Dict[int, array] = {}
+
+    # Returns the id of the cell at the given point
+    def cell(self, point: Point) -> int:
+        return point.y * self.width + point.x
+
+    # Returns the distances from the given source cell to every cell (UNREACHABLE if there is no path)
+    def table(self, source: int) -> array:
+        table = self.tables.get(source)
+        if table is None:
+            table = array('H', [UNREACHABLE]) * len(self.walkable)
+            table[source] = 0
+            queue = deque([source])
+            neighbors = self.neighbors
+            while queue:
+                cell = queue.popleft()
+                distance = table[cell] + 1
+                for neighbor in neighbors[cell]:
+                    if table[neighbor] == UNREACHABLE:
+                        table[neighbor] = distance
+                        queue.append(neighbor)
+            self.tables[source] = table
+        return table
+
+    # Returns the maze distance between two points (infinity if there is no path between them)
+    def distance(self, source: Point, target: Point) -> float:
+        distance = self.table(self.cell(source))[self.cell(target)]
+        return math.inf if distance == UNREACHABLE else distance
+
+# Returns the maze distance oracle of the problem's layout
+# It is created once per problem and stored in the problem cache so that it persists between heuristic calls
+def get_maze_distances(problem: DungeonProblem) -> MazeDistances:
+    cache = problem.cache()
+    distances = cache.get("maze_distances")
+    if distances is None:
+        distances = cache["maze_distances"] = MazeDistances(problem.layout)
+    return distances
@@ -0,0 +1,214 @@
+from typing import List, Optional
+import heapq
+import math
+
+from problem import HeuristicFunction, Problem, S, A, Solution
+from search_stats import SearchStats
+
+# This file contains memory-bounded alternatives to A* for problems where the A* frontier does not fit in memory.
+# They have the same signature as the informed search functions in "search.py" so they can be used by the InformedSearchAgent.
+# Both searches can optionally receive a SearchStats object (see "search_stats.py") where:
+#   the expanded nodes include the re-expansions done by every iteration (IDA*) or after a node is forgotten (SMA*)
+#   the peak frontier is the largest number of nodes that were waiting to be expanded at the same time
+#   the peak explored size of SMA* is the largest number of nodes kept in memory
+
+# Iterative Deepening A* runs depth-first searches that are bounded by f = g + h.
+# Every iteration raises the bound to the lowest f that exceeded the previous bound, so the first goal found is optimal
+# (if the heuristic is admissible) while the memory is linear in the solution depth.
+# Cycles are pruned by keeping the states of the current path in a hash set.
+def IterativeDeepeningAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, stats: Optional[SearchStats] = None) -> Solution:
+    if stats is not None: heuristic = stats.begin(heuristic)
+    bound = heuristic(problem, initial_state)
+    while bound < math.inf:
+        next_bound = math.inf
+        # The current path: its states (also stored in a set for the cycle checks), the actions and the path costs
+        states, on_path, path, costs = [initial_state], {initial_state}, [], [0]
+        # For every state on the path, we store an iterator over the actions that were not tried yet
+        pending: List = [None]
+        while pending:
+            state, g = states[-1], costs[-1]
+            if pending[-1] is None:
+                # This is the first visit of the state, so we check the bound and the goal before expanding it
+                f = g + heuristic(problem, state)
+                if f > bound:
+                    next_bound = min(next_bound, f)
+                    pending[-1] = iter(())
+                elif problem.is_goal(state):
+                    if stats is not None: stats.end()
+                    return path
+                else:
+                    if stats is not None: stats.expand(len(pending))
+                    pending[-1] = iter(problem.expand(state))
+            # Go deeper using the next successor that does not create a cycle
+            for action, child, action_cost in pending[-1]:
+                if stats is not None: stats.generated += 1
+                if child in on_path:
+                    if stats is not None: stats.duplicates += 1
+                    continue
+                states.append(child)
+                on_path.add(child)
+                path.append(action)
+                costs.append(g + action_cost)
+                pending.append(None)
+                break
+            else:
+                # All the actions were tried so we backtrack
+                pending.pop()
+                on_path.discard(states.pop())
+                costs.pop()
+                if path: path.pop()
+        bound = next_bound
+    if stats is not None: stats.end()
+    return None
+
+# The heaps of SMA* are rebuilt when they hold more than this multiple of the number of nodes in memory
+COMPACT_FACTOR = 2
+
+# A node of the SMA* search tree
+class _SMANode:
+    __slots__ = ("state", "parent", "action", "g", "f", "depth", "children", "forgotten", "version", "leaf_version")
+
+    def __init__(self, state, parent: Optional['_SMANode'], action, g: float, f: float) -> None:
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.g = g
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children: Optional[List['_SMANode']] = None # None until the node is expanded (or after all its children are forgotten)
+        self.forgotten = math.inf                          # The lowest f among the children that were removed from memory
+        self.version = 0                                   # Used to invalidate the old entries of the node in the frontier heap
+        self.leaf_version = 0                              # Used to invalidate the old entries of the node in the leaves heap
+
+    # Returns the list of actions from the root to this node
+    def path(self) -> List:
+        path, node = [], self
+        while node.parent is not None:
+            path.append(node.action)
+            node = node.parent
+        path.reverse()
+        return path
+
+# Simplified Memory-bounded A* keeps at most "budget" nodes in memory.
+# When the budget is exceeded, it forgets the shallowest leaf with the highest f and backs up its f into its parent,
+# so the parent knows the cost of the forgotten subtree. The parent then goes back to the frontier (with the f of
+# its forgotten children as its priority) to regenerate them later if they become the most promising again.
+# The returned solution is optimal if the budget can hold the nodes on the optimal path (its depth + 1)
+# plus the children of the deepest expanded node.
+def SMAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, budget: int = 100000, stats: Optional[SearchStats] = None) -> Solution:
+    if stats is not None: heuristic = stats.begin(heuristic)
+    # The frontier contains the leaves of the tree and the nodes that have forgotten children.
+    # It is a heap (with lazy invalidation using the node versions) that returns the deepest node with the lowest priority.
+    # The leaves are also stored in a second heap that returns the shallowest leaf with the highest f (the next one to forget).
+    # The stale entries are dropped from both heaps once they exceed COMPACT_FACTOR times the number of nodes in memory,
+    # so the heaps (like the tree) stay within a constant factor of the budget.
+    frontier, frontier_heap, leaves, leaves_heap = set(), [], set(), []
+    order = 0 # Breaks the remaining ties in the heaps in insertion order
+    def add_to_frontier(node: _SMANode, priority: float):
+        nonlocal order
+        node.version += 1
+        frontier.add(node)
+        heapq.heappush(frontier_heap, (priority, -node.depth, order, node.version, node))
+        order += 1
+    def add_leaf(node: _SMANode):
+        nonlocal order
+        node.leaf_version += 1
+        leaves.add(node)
+        heapq.heappush(leaves_heap, (-node.f, node.depth, order, node.leaf_version, node))
+        order += 1
+    # Rebuild the heaps with their live entries if they contain too many stale entries
+    def compact():
+        nonlocal frontier_heap, leaves_heap
+        limit = COMPACT_FACTOR * (in_memory + 1)
+        if len(frontier_heap) > limit:
+            frontier_heap = [entry for entry in frontier_heap if entry[4] in frontier and entry[3] == entry[4].version]
+            heapq.heapify(frontier_heap)
+        if len(leaves_heap) > limit:
+            leaves_heap = [entry for entry in leaves_heap if entry[4] in leaves and entry[3] == entry[4].leaf_version]
+            heapq.heapify(leaves_heap)
+    # Update the f of the node from its children and propagate the change to its ancestors
+    def backup(node: _SMANode):
+        while node is not None and node.children:
+            f = min(node.forgotten, min(child.f for child in node.children))
+            if f == node.f: break
+            node.f = f
+            node = node.parent
+    root = _SMANode(initial_state, None, None, 0, heuristic(problem, initial_state))
+    add_to_frontier(root, root.f)
+    add_leaf(root)
+    in_memory = 1
+    while frontier:
+        compact()
+        # Select the deepest node with the lowest priority
+        while True:
+            priority, _, _, version, node = heapq.heappop(frontier_heap)
+            if node in frontier and version == node.version: break
+        frontier.discard(node)
+        if priority == math.inf:
+            break
+        is_leaf = node.children is None
+        if is_leaf:
+            if problem.is_goal(node.state):
+                if stats is not None: stats.end()
+                return node.path()
+            leaves.discard(node)
+            node.children = []
+        # Generate the children of a leaf, or only the forgotten children of a node that is already expanded
+        # The priority of the node is a lower bound for the f of these children
+        existing = {child.state for child in node.children}
+        children = []
+        if node.depth < budget - 1:
+            if stats is not None: stats.expand(len(frontier) + 1, in_memory)
+            ancestors = set()
+            ancestor = node
+            while ancestor is not None:
+                ancestors.add(ancestor.state)
+                ancestor = ancestor.parent
+            for action, child_state, action_cost in problem.expand(node.state):
+                if stats is not None: stats.generated += 1
+                if child_state in ancestors or child_state in existing:
+                    if stats is not None: stats.duplicates += 1
+                    continue
+                g = node.g + action_cost
+                children.append(_SMANode(child_state, node, action, g, max(priority, g + heuristic(problem, child_state))))
+        node.forgotten = math.inf
+        if is_leaf and not children:
+            # Dead end (or the depth limit was reached): the node can never lead to a goal within the budget
+            node.children = None
+            node.f = math.inf
+            add_leaf(node)
+            backup(node.parent)
+            continue
+        node.children.extend(children)
+        if stats is not None and not is_leaf: stats.reopened += len(children)
+        for child in children:
+            add_to_frontier(child, child.f)
+            add_leaf(child)
+        in_memory += len(children)
+        backup(node)
+        # Forget the shallowest leaves with the highest f until we are back within the budget
+        while in_memory > budget:
+            _, _, _, version, leaf = heapq.heappop(leaves_heap)
+            if leaf not in leaves or version != leaf.leaf_version: continue
+            # The root is never forgotten
+            if leaf.parent is None:
+                add_leaf(leaf)
+                break
+            leaves.discard(leaf)
+            frontier.discard(leaf)
+            parent = leaf.parent
+            parent.children.remove(leaf)
+            parent.forgotten = min(parent.forgotten, leaf.f)
+            in_memory -= 1
+            if parent.children:
+                backup(parent)
+                add_to_frontier(parent, parent.forgotten)
+            else:
+                # All the children were forgotten so the parent becomes a leaf again
+                parent.children = None
+                parent.f = parent.forgotten
+                parent.forgotten = math.inf
+                add_to_frontier(parent, parent.f)
+                add_leaf(parent)
+    if stats is not None: stats.end()
+    return None
@@ -0,0 +1,217 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import math
+import multiprocessing as mp
+import queue
+
+from problem import HeuristicFunction, Problem, S, A, Solution
+from search_stats import SearchStats
+from helpers.utils import fetch_tracked_call_count
+
+# The number of generated nodes sent to another worker at once
+SEND_BATCH_SIZE = 64
+# The number of expansions after which a worker sends all its pending nodes (so the other workers do not starve)
+FLUSH_INTERVAL = 256
+
+# This file contains a hash distributed A* (HDA*) that runs on multiple processes (threads would not help because of the GIL).
+# Every state is owned by exactly one worker (chosen by hashing the state) which keeps its open list, its best g values and its parents.
+# A worker expands the best node in its open list and sends every generated child to its owner (in batches over the owner's queue).
+# When a worker expands a goal, it updates the shared incumbent cost; after that, all the nodes with f >= incumbent are pruned.
+# The search ends when every worker is idle (no node with f < incumbent) and no message is in flight,
+# which proves that the incumbent is optimal (if the heuristic is admissible).
+# The goal tests of the workers are counted in their own processes, so if the problem's "is_goal" is tracked (see "track_call_count"),
+# the workers send their counts when they stop and the coordinator adds them to the counter of this process.
+# Note: the partition function must give the same value in every process, so the default (hash) only works for states
+# whose hash does not depend on the process (e.g. tuples of integers like the compact dungeon states).
+
+# The state shared between the workers and the coordinator
+class _SharedState:
+    def __init__(self, context, workers: int) -> None:
+        self.inboxes = [context.Queue() for _ in range(workers)]    # The messages received by every worker
+        self.results = context.Queue()                              # The messages sent to the coordinator
+        self.incumbent = context.Value('d', math.inf)               # The cost of the best solution found so far
+        self.sent = context.Array('q', workers)                     # The number of node batches sent by every worker
+        self.received = context.Array('q', workers)                 # The number of node batches received by every worker
+        self.idle = context.Array('b', workers)                     # Whether every worker is idle
+
+# The main function of every worker
+# If "collect_stats" is True, the worker fills its own SearchStats and sends it to the coordinator when it stops
+def _worker(index: int, workers: int, shared: _SharedState, problem: Problem, initial_state: Any, heuristic: HeuristicFunction, partition: Callable[[Any], int], collect_stats: bool = False) -> None:
+    stats = SearchStats() if collect_stats else None
+    if stats is not None: heuristic = stats.begin(heuristic)
+    # The worker may inherit the call counter of the coordinator, so it starts counting from 0
+    is_goal = type(problem).is_goal
+    tracked = hasattr(is_goal, "calls")
+    if tracked: fetch_tracked_call_count(is_goal)
+    inbox = shared.inboxes[index]
+    incumbent = shared.incumbent
+    frontier: List[Tuple[float, float, int, Any]] = []      # The open list as (f, g, counter, state)
+    g_values: Dict[Any, float] = {}                         # The best g value of every owned state
+    parents: Dict[Any, Tuple[Any, Any]] = {}                # The parent state and the action that reached every owned state
+    outboxes: List[List[Tuple[Any, float, Any, Any]]] = [[] for _ in range(workers)]
+    counter = 0
+    expanded = 0
+
+    # Add a node (owned by this worker) to the open list if it improves the g value of its state
+    def receive(state, g, parent, action):
+        nonlocal counter
+        if g >= g_values.get(state, math.inf):
+            if stats is not None: stats.duplicates += 1
+            return
+        f = g + heuristic(problem, state)
+        if f >= incumbent.value: return
+        if stats is not None and state in g_values: stats.reopened += 1
+        g_values[state] = g
+        parents[state] = (parent, action)
+        counter += 1
+        heapq.heappush(frontier, (f, g, counter, state))
+
+    # Send the pending nodes to another worker
+    # The counter is incremented before sending so that the coordinator never sees a message in flight as delivered
+    def flush(target):
+        if not outboxes[target]: return
+        with shared.sent.get_lock():
+            shared.sent[index] += 1
+        shared.inboxes[target].put(("nodes", outboxes[target]))
+        outboxes[target] = []
+
+    # Process a message received from the inbox. Returns False if the worker should stop
+    def handle(message):
+        kind = message[0]
+        if kind == "nodes":
+            shared.idle[index] = 0
+            for node in message[1]:
+                receive(*node)
+            with shared.received.get_lock():
+                shared.received[index] += 1
+        elif kind == "trace":
+            shared.results.put(("trace", message[1], parents.get(message[1])))
+        elif kind == "stop":
+            if stats is not None: stats.end()
+            shared.results.put(("stats", index, stats, fetch_tracked_call_count(is_goal) if tracked else 0))
+            return False
+        return True
+
+    if partition(initial_state) % workers == index:
+        receive(initial_state, 0, None, None)
+    while True:
+        # First, receive all the nodes sent by the other workers
+        try:
+            while True:
+                if not handle(inbox.get_nowait()): return
+        except queue.Empty:
+            pass
+        # Remove the nodes that were improved (stale) or cannot lead to a better solution
+        while frontier and (frontier[0][1] > g_values[frontier[0][3]] or frontier[0][0] >= incumbent.value):
+            heapq.heappop(frontier)
+        if not frontier:
+            # There is nothing to do, so send all the pending nodes then wait for new messages
+            for target in range(workers):
+                flush(target)
+            shared.idle[index] = 1
+            try:
+                if not handle(inbox.get(timeout=0.05)): return
+            except queue.Empty:
+                pass
+            continue
+        f, g, _, state = heapq.heappop(frontier)
+        if problem.is_goal(state):
+            with incumbent.get_lock():
+                if g < incumbent.value:
+                    incumbent.value = g
+                    shared.results.put(("goal", g, state))
+            continue
+        expanded += 1
+        if stats is not None: stats.expand(len(frontier) + 1, len(g_values))
+        for action, child, action_cost in problem.expand(state):
+            if stats is not None: stats.generated += 1
+            child_g = g + action_cost
+            if child_g >= incumbent.value: continue
+            target = partition(child) % workers
+            if target == index:
+                receive(child, child_g, state, action)
+            else:
+                outboxes[target].append((child, child_g, state, action))
+                if len(outboxes[target]) >= SEND_BATCH_SIZE:
+                    flush(target)
+        if expanded % FLUSH_INTERVAL == 0:
+            for target in range(workers):
+                flush(target)
+
+# Returns True if every worker is idle and no message is in flight
+# The counters are read before and after the idle flags: an idle worker can only become busy by receiving a message,
+# so if the counters did not change while all the workers were idle, no work remains
+def _is_finished(shared: _SharedState) -> bool:
+    before = (sum(shared.sent), sum(shared.received))
+    if before[0] != before[1] or not all(shared.idle): return False
+    return before == (sum(shared.sent), sum(shared.received))
+
+# Hash distributed A* search using "workers" processes
+# The problem, the heuristic and the states must be picklable (the heuristic and the partition must be defined at the top level of a module).
+# If "stats" is given, the statistics of all the workers are merged into it (see SearchStats.merge) and its elapsed time is the wall time of the whole search.
+def HashDistributedAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, workers: int = 2,
+                               partition: Callable[[S], int] = hash, stats: Optional[SearchStats] = None) -> Solution:
+    if stats is not None: stats.begin()
+    context = mp.get_context()
+    shared = _SharedState(context, workers)
+    processes = [
+        context.Process(target=_worker, args=(index, workers, shared, problem, initial_state, heuristic, partition, stats is not None), daemon=True)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    goal = None
+    try:
+        # Wait until the search ends while collecting the goals found by the workers
+        while True:
+            try:
+                message = shared.results.get(timeout=0.01)
+                if message[0] == "goal" and (goal is None or message[1] < goal[0]):
+                    goal = (message[1], message[2])
+                continue
+            except queue.Empty:
+                pass
+            # A worker starts busy (before it receives its first node), so we wait until all the workers were idle at least once
+            if _is_finished(shared):
+                break
+        # Collect any goal that was reported just before the end
+        while True:
+            try:
+                message = shared.results.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "goal" and (goal is None or message[1] < goal[0]):
+                goal = (message[1], message[2])
+        # Rebuild the path by asking the owner of every state for its parent
+        solution = None
+        if goal is not None:
+            solution = []
+            state = goal[1]
+            while True:
+                shared.inboxes[partition(state) % workers].put(("trace", state))
+                while True:
+                    message = shared.results.get()
+                    if message[0] == "trace": break
+                parent, action = message[2]
+                if parent is None: break
+                solution.append(action)
+                state = parent
+            solution.reverse()
+        for inbox in shared.inboxes:
+            inbox.put(("stop",))
+        explored = 0
+        for _ in range(workers):
+            while True:
+                message = shared.results.get()
+                if message[0] == "stats": break
+            if stats is not None: stats.merge(message[2])
+            explored += message[3]
+        is_goal = type(problem).is_goal
+        if hasattr(is_goal, "calls"): is_goal.calls += explored
+        if stats is not None: stats.end()
+        return solution
+    finally:
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
@@ -1,6 +1,6 @@
 from typing import Any, Dict, Set, Tuple, List
 from problem import Problem
-from mathutils import Direction, Point
+from mathutils import Direction, Point, PointGrid, get_point_grid
 from helpers import utils
 
 #TODO: (Optional) Instead of Any, you can define a type for the parking state
@@ -8,6 +8,9 @@ ParkingState = Tuple[Point]
 # An action of the parking problem is a tuple containing an index 'i' and a direction 'd' where car 'i' should move in the direction 'd'.
 ParkingAction = Tuple[int, Direction]
 
+# The directions in the order in which the actions of every car are generated
+ParkingDirections = [Direction.LEFT, Direction.RIGHT, Direction.DOWN, Direction.UP]
+
 # This is the implementation of the parking problem
 class ParkingProblem(Problem[ParkingState, ParkingAction]):
     passages: Set[Point]    # A set of points which indicate where a car can be (in other words, every position except walls).
@@ -16,6 +19,7 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
                             # if a position does not contain a parking slot, it will not be in this dictionary.
     width: int              # The width of the parking lot.
     height: int             # The height of the parking lot.
+    grid: PointGrid         # The shared points of the parking lot and their neighbors (the moves are table lookups)
 
     # This function should return the initial state
     def get_initial_state(self) -> ParkingState:
@@ -36,20 +40,16 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
     def get_actions(self, state: ParkingState) -> List[ParkingAction]:
         #TODO: ADD YOUR CODE HERE
         actions = []
-        directions = [
-        (Point(-1, 0), 'L'),  # Left
-        (Point(1, 0), 'R'),   # Right
-        (Point(0, 1), 'D'),   # Down
-        (Point(0, -1), 'U')   # Up
-    ]
+        # The occupied positions are stored in a set to check them in O(1)
+        occupied = set(state)
         # for each car get possible actions
         for i,car in enumerate(state):
-            # trying LEFT, RIGHT, UP, DOWN
-            for direction_vector, action in directions:
-                position = car + direction_vector   
+            # trying LEFT, RIGHT, DOWN, UP
+            for direction in ParkingDirections:
+                position = car + direction.to_vector()
                 # If the position contains another car or is a wall then continue
-                if position in state or position not in self.passages: continue
-                actions.append((i,action))
+                if position in occupied or position not in self.passages: continue
+                actions.append((i,direction))
         return actions
     
     # This function returns a new state which is the result of applying the given action to the given state
@@ -78,6 +78,22 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
         if action_result in self.slots and self.slots.get(action_result) != car_index:
             return 101
         return 1
+
+    # This function returns the (action, next state, cost) of every possible action from the given state
+    # It generates the actions like "get_actions" and builds the successor and the cost from the same target position
+    def expand(self, state: ParkingState) -> List[Tuple[ParkingAction, ParkingState, float]]:
+        successors = []
+        occupied = set(state)
+        passages, slots, grid = self.passages, self.slots, self.grid
+        moves = [(direction, grid.neighbors[direction]) for direction in ParkingDirections]
+        for i, car in enumerate(state):
+            cell = grid.cell(car)
+            for direction, neighbors in moves:
+                position = neighbors[cell]
+                if position in occupied or position not in passages: continue
+                owner = slots.get(position)
+                successors.append(((i, direction), state[:i] + (position,) + state[i+1:], 101 if owner is not None and owner != i else 1))
+        return successors
     
     # Read a parking problem from text containing a grid of tiles
     @staticmethod
@@ -86,17 +102,20 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
         cars, slots = {}, {}
         lines = [line for line in (line.strip() for line in text.splitlines()) if line]
         width, height = max(len(line) for line in lines), len(lines)
+        grid = get_point_grid(width, height)
         for y, line in enumerate(lines):
             for x, char in enumerate(line):
                 if char != "#":
-                    passages.add(Point(x, y))
+                    point = grid.point(x, y)
+                    passages.add(point)
                     if char == '.':
                         pass
                     elif char in "ABCDEFGHIJ":
-                        cars[ord(char) - ord('A')] = Point(x, y)
+                        cars[ord(char) - ord('A')] = point
                     elif char in "0123456789":
-                        slots[int(char)] = Point(x, y)
+                        slots[int(char)] = point
         problem = ParkingProblem()
+        problem.grid = grid
         problem.passages = passages
         problem.cars = tuple(cars[i] for i in range(len(cars)))
         problem.slots = {position:index for index, position in slots.items()}
@@ -110,3 +129,107 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
         with open(path, 'r') as f:
             return ParkingProblem.from_text(f.read())
     
+
+
+# The packed parking state is a tuple of small integers where state[i] is the cell id (y * width + x) of car 'i'
+PackedParkingState = Tuple[int, ...]
+
+# This is a packed implementation of the parking problem with the same actions and costs as the ParkingProblem
+# All the geometry is precomputed in tables indexed by the cell id so that
+# the action generation, the successor and the cost are table lookups without creating any Point.
+class PackedParkingProblem(Problem[PackedParkingState, ParkingAction]):
+    problem: ParkingProblem       # The original parking problem
+    width: int                    # The width of the parking lot
+    moves: List[List[Tuple[Direction, int]]] # moves[cell] contains (direction, target cell) for every direction that does not lead into a wall
+    targets: List[List[int]]      # targets[cell][direction] is the cell reached by moving in this direction (-1 if it is a wall)
+    slot_owner: List[int]         # slot_owner[cell] is the index of the car that owns the slot at this cell (-1 if there is no slot)
+    goal: PackedParkingState      # The only goal state: every car is at its slot
+    initial_state: PackedParkingState
+
+    def get_initial_state(self) -> PackedParkingState:
+        return self.initial_state
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @utils.track_call_count
+    def is_goal(self, state: PackedParkingState) -> bool:
+        return state == self.goal
+
+    def get_actions(self, state: PackedParkingState) -> List[ParkingAction]:
+        actions = []
+        moves = self.moves
+        # The occupied cells are stored in a set to check them in O(1)
+        occupied = set(state)
+        for i, car in enumerate(state):
+            for direction, target in moves[car]:
+                if target not in occupied:
+                    actions.append((i, direction))
+        return actions
+
+    def get_successor(self, state: PackedParkingState, action: ParkingAction) -> PackedParkingState:
+        car_index, direction = action
+        target = self.targets[state[car_index]][direction]
+        # A car cannot move into a wall or into another car
+        if target < 0 or target in state:
+            return state
+        return state[:car_index] + (target,) + state[car_index+1:]
+
+    def get_cost(self, state: PackedParkingState, action: ParkingAction) -> float:
+        car_index, direction = action
+        owner = self.slot_owner[self.targets[state[car_index]][direction]]
+        # If the given action will move the car to slot of another car
+        return 101 if owner >= 0 and owner != car_index else 1
+
+    def expand(self, state: PackedParkingState) -> List[Tuple[ParkingAction, PackedParkingState, float]]:
+        successors = []
+        moves, slot_owner = self.moves, self.slot_owner
+        occupied = set(state)
+        for i, car in enumerate(state):
+            for direction, target in moves[car]:
+                if target in occupied: continue
+                owner = slot_owner[target]
+                successors.append(((i, direction), state[:i] + (target,) + state[i+1:], 101 if owner >= 0 and owner != i else 1))
+        return successors
+
+    # Convert a packed state to the equivalent ParkingState
+    def unpack(self, state: PackedParkingState) -> ParkingState:
+        return tuple(Point(cell % self.width, cell // self.width) for cell in state)
+
+    # Convert a ParkingState to the equivalent packed state
+    def pack(self, state: ParkingState) -> PackedParkingState:
+        return tuple(position.y * self.width + position.x for position in state)
+
+    # Create the packed version of a parking problem
+    @staticmethod
+    def from_problem(problem: ParkingProblem) -> 'PackedParkingProblem':
+        width, size = problem.width, problem.width * problem.height
+        packed = PackedParkingProblem()
+        packed.problem = problem
+        packed.width = width
+        packed.moves = [[] for _ in range(size)]
+        packed.targets = [[-1] * len(Direction) for _ in range(size)]
+        for position in problem.passages:
+            cell = position.y * width + position.x
+            for direction in ParkingDirections:
+                target = position + direction.to_vector()
+                if target in problem.passages:
+                    packed.moves[cell].append((direction, target.y * width + target.x))
+                    packed.targets[cell][direction] = target.y * width + target.x
+        packed.slot_owner = [-1] * size
+        goal = [None] * len(problem.cars)
+        for position, index in problem.slots.items():
+            packed.slot_owner[position.y * width + position.x] = index
+            if index < len(goal):
+                goal[index] = position.y * width + position.x
+        packed.goal = tuple(goal)
+        packed.initial_state = packed.pack(problem.cars)
+        return packed
+
+    # Read a packed parking problem from text containing a grid of tiles
+    @staticmethod
+    def from_text(text: str) -> 'PackedParkingProblem':
+        return PackedParkingProblem.from_problem(ParkingProblem.from_text(text))
+
+    # Read a packed parking problem from file containing a grid of tiles
+    @staticmethod
+    def from_file(path: str) -> 'PackedParkingProblem':
+        return PackedParkingProblem.from_problem(ParkingProblem.from_file(path))
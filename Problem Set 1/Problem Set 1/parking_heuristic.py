@@ -0,0 +1,89 @@
+from array import array
+from typing import List, Optional
+import heapq
+import math
+
+from parking import ParkingDirections, ParkingProblem, ParkingState, PackedParkingProblem, PackedParkingState
+from persistence import cache_path, fingerprint, load_arrays, save_arrays
+
+# The value stored in the pattern database for the cells from which a car cannot reach its slot
+UNREACHABLE = 0xFFFFFFFF
+
+# This file contains an additive pattern-database heuristic for the parking problem.
+# For every car, the pattern database stores the exact cost to move the car from every cell to its slot on the empty lot
+# (other cars are ignored but the penalty of 101 for entering the slot of another car is included).
+# Every action moves exactly one car and its cost is only counted in the table of this car,
+# so the sum of the per-car costs is admissible and consistent.
+
+# Returns a key that identifies the lot (walls and slots) so that the pattern databases are only reused for the same lot
+def parking_fingerprint(problem: ParkingProblem) -> str:
+    width = problem.width
+    passages = sorted(position.y * width + position.x for position in problem.passages)
+    slots = sorted((position.y * width + position.x, index) for position, index in problem.slots.items())
+    return fingerprint("parking", problem.width, problem.height, len(problem.cars), passages, slots)
+
+# Build the pattern database: tables[i][cell] is the cost to move car 'i' from the cell to its slot on the empty lot
+def build_parking_pdb(problem: ParkingProblem) -> List[array]:
+    width, size = problem.width, problem.width * problem.height
+    owner = [-1] * size
+    for position, index in problem.slots.items():
+        owner[position.y * width + position.x] = index
+    neighbors: List[List[int]] = [[] for _ in range(size)]
+    for position in problem.passages:
+        for direction in ParkingDirections:
+            target = position + direction.to_vector()
+            if target in problem.passages:
+                neighbors[position.y * width + position.x].append(target.y * width + target.x)
+    slot_cells = {index: position.y * width + position.x for position, index in problem.slots.items()}
+    tables = []
+    for car in range(len(problem.cars)):
+        table = array('I', [UNREACHABLE]) * size
+        slot = slot_cells.get(car)
+        if slot is not None:
+            # Dijkstra backward from the slot: moving from "previous" into "cell" costs 101 if "cell" is the slot of another car
+            table[slot] = 0
+            queue = [(0, slot)]
+            while queue:
+                cost, cell = heapq.heappop(queue)
+                if cost > table[cell]: continue
+                step = 101 if owner[cell] not in (-1, car) else 1
+                for previous in neighbors[cell]:
+                    if cost + step < table[previous]:
+                        table[previous] = cost + step
+                        heapq.heappush(queue, (cost + step, previous))
+        tables.append(table)
+    return tables
+
+# Returns the pattern database of the problem
+# It is loaded from the cache directory if it was built before (for the same lot), otherwise it is built and saved there.
+# It is also stored in the problem cache so it is only loaded once per problem
+def get_parking_pdb(problem: ParkingProblem, directory: Optional[str] = None) -> List[array]:
+    cache = problem.cache()
+    tables = cache.get("parking_pdb")
+    if tables is None:
+        path = cache_path("parking_pdb", parking_fingerprint(problem), directory)
+        arrays = load_arrays(path)
+        if arrays is not None:
+            tables = [arrays[str(car)] for car in range(len(problem.cars))]
+        else:
+            tables = build_parking_pdb(problem)
+            save_arrays(path, {str(car): table for car, table in enumerate(tables)})
+        cache["parking_pdb"] = tables
+    return tables
+
+# Sum the costs of the cars given their cell ids
+def _sum_costs(tables: List[array], cells) -> float:
+    total = 0
+    for table, cell in zip(tables, cells):
+        cost = table[cell]
+        if cost == UNREACHABLE:
+            return math.inf
+        total += cost
+    return total
+
+def parking_heuristic(problem: ParkingProblem, state: ParkingState) -> float:
+    width = problem.width
+    return _sum_costs(get_parking_pdb(problem), (position.y * width + position.x for position in state))
+
+def packed_parking_heuristic(problem: PackedParkingProblem, state: PackedParkingState) -> float:
+    return _sum_costs(get_parking_pdb(problem.problem), state)
@@ -0,0 +1,83 @@
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+
+# This file contains helpers to store precomputed tables (e.g. heuristic tables) on disk so they can be reused across runs
+# The tables are stored in a cache directory which can be changed using the environment variable "SEARCH_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.environ.get("SEARCH_CACHE_DIR", ".search_cache")
+
+# Returns a short hash that identifies the given parts (e.g. the layout of a level)
+# It is used as a key in the file names so that the tables of different levels never mix
+def fingerprint(*parts: Iterable) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+# Returns the path of a cache file given its kind (e.g. "parking_pdb") and its key (a fingerprint)
+def cache_path(kind: str, key: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or DEFAULT_CACHE_DIR, f"{kind}_{key}.bin")
+
+# Save a dictionary of arrays to a file
+# The file starts with a line containing a json header (the name, typecode and length of every array) followed by the raw array bytes
+# The header line is padded with spaces so that the arrays start at a multiple of 8 bytes (which allows mapping them, see "map_arrays")
+# The file is written to a temporary file first then renamed, so a reader never sees a partially written file
+def save_arrays(path: str, arrays: Dict[str, array], metadata: Optional[Dict] = None) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    header = {
+        "metadata": metadata or {},
+        "arrays": [[name, values.typecode, len(values)] for name, values in arrays.items()]
+    }
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        line = json.dumps(header).encode()
+        f.write(line + b" " * (-(len(line) + 1) % 8) + b"\n")
+        for values in arrays.values():
+            values.tofile(f)
+    os.replace(temporary, path)
+
+# Read the header of a file written by "save_arrays"
+# Returns the header and the offset of the first array in the file
+def read_header(path: str) -> Tuple[Dict, int]:
+    with open(path, "rb") as f:
+        line = f.readline()
+    return json.loads(line), len(line)
+
+# Load a dictionary of arrays written by "save_arrays" (or None if the file does not exist)
+def load_arrays(path: str) -> Optional[Dict[str, array]]:
+    if not os.path.exists(path):
+        return None
+    arrays = {}
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        for name, typecode, length in header["arrays"]:
+            values = array(typecode)
+            values.fromfile(f, length)
+            arrays[name] = values
+    return arrays
+
+# Map the arrays of a file written by "save_arrays" into memory (or return None if the file does not exist)
+# Every array is returned as a read-only memoryview (with the same typecode) of the mapped file, so the arrays are not read
+# until they are accessed and the pages are shared between the processes that map the same file.
+# The memoryviews keep the mapping open as long as they are referenced.
+def map_arrays(path: str) -> Optional[Dict[str, memoryview]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        line = f.readline()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header = json.loads(line)
+    view = memoryview(mapped)
+    offset = len(line)
+    arrays = {}
+    for name, typecode, length in header["arrays"]:
+        size = array(typecode).itemsize * length
+        arrays[name] = view[offset:offset+size].cast(typecode)
+        offset += size
+    return arrays
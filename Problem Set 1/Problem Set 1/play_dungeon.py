@@ -2,9 +2,10 @@ from typing import List
 from dungeon import DungeonProblem, Direction, DungeonState, DungeonTile
 from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent
 from helpers.utils import fetch_tracked_call_count
-from helpers.heuristic_checks import test_heuristic_consistency
+from helpers.heuristic_checks import ConsistencyChecker
+from problem import zero_heuristic
 from functools import lru_cache
-import argparse, time
+import argparse, os, time
 
 def colored_dungeon(level: str):
     from helpers.utils import bcolors
@@ -18,7 +19,7 @@ def colored_dungeon(level: str):
 # Return the heuristic selected by the user
 def get_heuristic(name: str):
     if name == "zero":
-        return lambda *_: 0
+        return zero_heuristic
     if name == "weak":
         from dungeon_heuristic import weak_heuristic
         return weak_heuristic
@@ -28,6 +29,19 @@ def get_heuristic(name: str):
     print(f"Requested Heuristic '{name}' is invalid")
     exit(-1)
 
+# Return the version of the heuristic selected by the user for the compact dungeon states
+def get_compact_heuristic(name: str):
+    if name == "zero":
+        return zero_heuristic
+    if name == "weak":
+        from compact_dungeon import compact_weak_heuristic
+        return compact_weak_heuristic
+    if name == "strong":
+        from compact_dungeon import compact_strong_heuristic
+        return compact_strong_heuristic
+    print(f"Requested Heuristic '{name}' is invalid")
+    exit(-1)
+
 # Create an agent based on the user selections
 def create_agent(args: argparse.Namespace):
     agent_type: str = args.agent
@@ -61,18 +75,65 @@ def create_agent(args: argparse.Namespace):
         from search import AStarSearch
         # We cache the heuristic calls to speed up the search process if the heuristic is not fast
         heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
-        # If desired by the user, we track every transition and check for the heuristic consistency for each transition
+        # If desired by the user, the search checks the heuristic consistency of (a sample of) the generated transitions
         if args.checks:
-            DungeonProblem.get_successor = test_heuristic_consistency(heuristic)(DungeonProblem.get_successor)
+            checker = ConsistencyChecker(rate=args.check_rate)
+            return InformedSearchAgent(lambda problem, state, heuristic: AStarSearch(problem, state, heuristic, checker=checker), heuristic)
         return InformedSearchAgent(AStarSearch, heuristic)
     if agent_type == "gbfs":
         from search import BestFirstSearch
         # We cache the heuristic calls to speed up the search process if the heuristic is not fast
         heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
-        # If desired by the user, we track every transition and check for the heuristic consistency for each transition
+        # If desired by the user, the search checks the heuristic consistency of (a sample of) the generated transitions
         if args.checks:
-            DungeonProblem.get_successor = test_heuristic_consistency(heuristic)(DungeonProblem.get_successor)
+            checker = ConsistencyChecker(rate=args.check_rate)
+            return InformedSearchAgent(lambda problem, state, heuristic: BestFirstSearch(problem, state, heuristic, checker=checker), heuristic)
         return InformedSearchAgent(BestFirstSearch, heuristic)
+    if agent_type == "idastar":
+        from memory_bounded_search import IterativeDeepeningAStarSearch
+        # IDA* evaluates the heuristic of the same states in every iteration so caching it is very useful
+        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
+        return InformedSearchAgent(IterativeDeepeningAStarSearch, heuristic)
+    if agent_type == "smastar":
+        from memory_bounded_search import SMAStarSearch
+        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
+        # The number of nodes that SMA* is allowed to keep in memory
+        search_fn = lambda problem, state, heuristic: SMAStarSearch(problem, state, heuristic, budget=args.budget)
+        return InformedSearchAgent(search_fn, heuristic)
+    if agent_type == "hdastar":
+        from parallel_search import HashDistributedAStarSearch
+        from compact_dungeon import CompactDungeonProblem
+        # The workers run on the compact version of the problem (with the compact version of the heuristic)
+        # since its states have the same hash in every process
+        compact_heuristic = get_compact_heuristic(args.heuristic)
+        def search_fn(problem: DungeonProblem, state: DungeonState, heuristic) -> List[Direction]:
+            compact = CompactDungeonProblem.from_problem(problem)
+            fetch_tracked_call_count(CompactDungeonProblem.is_goal)
+            solution = HashDistributedAStarSearch(compact, compact.from_dungeon_state(state), compact_heuristic, workers=args.workers)
+            # The nodes explored by the workers are counted on the compact problem, so they are moved to the dungeon problem's counter
+            DungeonProblem.is_goal.calls += fetch_tracked_call_count(CompactDungeonProblem.is_goal)
+            return solution
+        return InformedSearchAgent(search_fn, get_heuristic(args.heuristic))
+    if agent_type == "arastar":
+        from anytime_search import AnytimeSearch
+        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
+        # Every search returns the best solution that the anytime search found before the deadline
+        search_fn = lambda problem, state, heuristic: AnytimeSearch(problem, state, heuristic, deadline_ms=args.deadline)
+        # A search that found nothing before the deadline is not remembered, so the next step searches again
+        return InformedSearchAgent(search_fn, heuristic, cache_failures=False)
+    if agent_type == "dstarlite":
+        from incremental_search import DStarLiteAgent
+        # The agent plans backward from the goal and repairs its plan if the layout changes
+        return DStarLiteAgent()
+    if agent_type == "jps":
+        from jump_point_search import JumpPointLegsSearch
+        # A fast (but not optimal) agent that walks to the nearest coin then to the exit using the jump point search
+        return UninformedSearchAgent(JumpPointLegsSearch)
+    if agent_type == "table":
+        from agents import CostToGoAgent
+        from cost_to_go import cost_to_go_heuristic
+        # The agent reads its actions from the exact cost-to-go table of the level (built once then memory-mapped from the cache)
+        return CostToGoAgent(cost_to_go_heuristic)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
@@ -85,6 +146,15 @@ def main(args: argparse.Namespace):
     print("Initial State:")
     state_printer(state)
     agent = create_agent(args)
+    # If desired by the user, the policy of the search agent and the heuristic caches are loaded from (and saved to) the cache directory
+    # so repeated runs on the same level reuse the solutions and the heuristic values found by the previous runs
+    stored = []
+    if args.persist:
+        from policy_store import load_heuristic_cache, load_policy
+        stored.append(load_heuristic_cache(problem))
+        if isinstance(agent, (UninformedSearchAgent, InformedSearchAgent)):
+            agent.policy = load_policy(problem, f"{args.agent}_{args.heuristic}")
+            stored.append(agent.policy)
     step = 0 # This will store the current step
     total_explored_nodes = 0 # This will store the number of traversed nodes during search
     unsolvable = False # This will store whether the problem is unsolvable or not
@@ -112,6 +182,8 @@ def main(args: argparse.Namespace):
             if goal_heuristic != 0:
                 print(f"ERROR: Expected heuristic at goal to be 0, got {goal_heuristic}")
         print("YOU WON!!")
+    for table in stored:
+        table.save()
     # This was a search agent, display the number of traversed nodes
     if not isinstance(agent, HumanAgent):
         print(f"Search explored {total_explored_nodes} nodes")
@@ -124,13 +196,23 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Dungeon as Human or AI")
     parser.add_argument("level", help="path to the dungeon to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs', 'idastar', 'smastar', 'hdastar', 'arastar', 'dstarlite', 'table', 'jps'],
                         help="the agent that will play the game")
     parser.add_argument("--heuristic", '-hf', default="zero",
                         choices=["zero", "weak", "strong"],
                         help="choose the heuristic to use with A* or Greedy Best First Search")
+    parser.add_argument("--budget", "-b", type=int, default=100000,
+                        help="the maximum number of nodes that SMA* can keep in memory")
+    parser.add_argument("--deadline", "-dl", type=float, default=1000,
+                        help="the time budget of every search of the anytime agent (arastar) in milliseconds")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count(),
+                        help="the number of worker processes used by the parallel A* (hdastar)")
     parser.add_argument("--checks", "-c", action='store_true', default=False,
                         help="Enable consistency checks for the heuristic")
+    parser.add_argument("--check-rate", "-cr", type=float, default=1.0,
+                        help="the fraction of the generated transitions checked for consistency (with --checks)")
+    parser.add_argument("--persist", "-p", action="store_true", default=False,
+                        help="Store the policy of the search agent and the heuristic caches of the level and reuse them in the next runs")
     parser.add_argument("--ansicolors", "-ac", action="store_true",
                         help="Print the dungeon on the console with ANSI colors (only works on some terminals)")
 
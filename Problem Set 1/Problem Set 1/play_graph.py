@@ -1,12 +1,22 @@
 import time
 from graph import GraphRoutingProblem, GraphNode, graphrouting_heuristic
 from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent
-from helpers.utils import fetch_recorded_calls
+from helpers.utils import fetch_recorded_calls, fetch_tracked_call_count
 import argparse, os, json
 
+# The agents that can play on the compact graph (the others use the node objects of the GraphRoutingProblem)
+COMPACT_AGENTS = ['bfs', 'dfs', 'ucs', 'astar', 'gbfs']
+
 # Create an agent based on the user selections
 def create_agent(args: argparse.Namespace):
     agent_type: str = args.agent
+    heuristic = graphrouting_heuristic
+    if args.compact:
+        if agent_type not in COMPACT_AGENTS:
+            print(f"Requested Agent '{agent_type}' cannot play on the compact graph (use one of: {', '.join(COMPACT_AGENTS)})")
+            exit(-1)
+        from compact_graph import compact_graphrouting_heuristic
+        heuristic = compact_graphrouting_heuristic
     if agent_type == "human":
         # This function reads the action from the user (human)
         def graph_user_action(problem: GraphRoutingProblem, state: GraphNode) -> GraphNode:
@@ -37,17 +47,41 @@ def create_agent(args: argparse.Namespace):
         return UninformedSearchAgent(UniformCostSearch)
     if agent_type == "astar":
         from search import AStarSearch
-        return InformedSearchAgent(AStarSearch, graphrouting_heuristic)
+        return InformedSearchAgent(AStarSearch, heuristic)
     if agent_type == "gbfs":
         from search import BestFirstSearch
-        return InformedSearchAgent(BestFirstSearch, graphrouting_heuristic)
+        return InformedSearchAgent(BestFirstSearch, heuristic)
+    if agent_type == "bidir":
+        from search import BidirectionalSearch
+        return UninformedSearchAgent(BidirectionalSearch)
+    if agent_type == "bidir_astar":
+        from search import BidirectionalSearch
+        return InformedSearchAgent(BidirectionalSearch, graphrouting_heuristic)
+    if agent_type == "alt":
+        from search import AStarSearch
+        from landmarks import landmark_heuristic
+        return InformedSearchAgent(AStarSearch, landmark_heuristic)
+    if agent_type == "ch":
+        from contraction_hierarchy import ContractionHierarchySearch
+        return UninformedSearchAgent(ContractionHierarchySearch)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
 def main(args: argparse.Namespace):
     start = time.time() # Track run time
     graph_path = args.graph
-    problem = GraphRoutingProblem.from_file(graph_path) # create the problem
+    if args.compact:
+        # The compact problem is loaded with the streaming loader and its states are node ids, so they are printed by name
+        from compact_graph import CompactGraphRoutingProblem
+        problem = CompactGraphRoutingProblem.from_file(graph_path)
+        node_name = problem.graph.names.__getitem__
+    else:
+        problem = GraphRoutingProblem.from_file(graph_path) # create the problem
+        node_name = str
+    if args.agent == "alt":
+        # Load (or build) the landmarks stored next to the graph file
+        from landmarks import get_landmarks
+        get_landmarks(problem, args.landmarks, graph_path)
     # Check if there is a figure for the graph that we can display on the console
     figure_path = json.load(open(graph_path, 'r')).get("figure")
     figure = None
@@ -59,17 +93,23 @@ def main(args: argparse.Namespace):
     print("Initial State:")
     if figure:
         print(figure)
-    print("Current Node:", state)
+    print("Current Node:", node_name(state))
     agent = create_agent(args)
     step = 0 # This will store the current step
     path_cost = 0 # This will store the total path cost
     traversed_nodes = [] # This will store all the traversed nodes in order of traversal
+    explored = 0 # This will store the number of explored nodes (the compact problem only counts them)
     unsolvable = False # This will store whether the problem is unsolvable or not
     while not problem.is_goal(state):
-        fetch_recorded_calls(GraphRoutingProblem.is_goal) # Clear the recorded calls
-        action = agent.act(problem, state) # Request an action from the agent
-        # Retrieve the traversed nodes
-        traversed_nodes += [call["args"][1].name for call in list(fetch_recorded_calls(GraphRoutingProblem.is_goal))]
+        if args.compact:
+            fetch_tracked_call_count(CompactGraphRoutingProblem.is_goal) # Clear the call count
+            action = agent.act(problem, state) # Request an action from the agent
+            explored += fetch_tracked_call_count(CompactGraphRoutingProblem.is_goal)
+        else:
+            fetch_recorded_calls(GraphRoutingProblem.is_goal) # Clear the recorded calls
+            action = agent.act(problem, state) # Request an action from the agent
+            # Retrieve the traversed nodes
+            traversed_nodes += [call["args"][1].name for call in list(fetch_recorded_calls(GraphRoutingProblem.is_goal))]
         # If no solution was found, break
         if action is None:
             print("Agent cannot find a solution, exiting...")
@@ -83,14 +123,16 @@ def main(args: argparse.Namespace):
         step += 1
         # Print any useful information to the user
         print("Step:", step)
-        print("Action:", str(action), f"(cost: {cost})")
+        print("Action:", node_name(action), f"(cost: {cost})")
         if figure:
             print(figure)
-        print("Current Node:", state)
+        print("Current Node:", node_name(state))
     if not unsolvable: print("YOU WON!!")
     print("Path Cost:", path_cost)
     # This was a search agent, display the traversed nodes
-    if not isinstance(agent, HumanAgent):
+    if args.compact:
+        print(f"Search explored {explored} nodes")
+    elif not isinstance(agent, HumanAgent):
         print(f"Traversal Order: {'->'.join(traversed_nodes)}")
     # Finally print the elapsed time for the whole process
     print(f"Elapsed time: {time.time() - start} seconds")
@@ -100,8 +142,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Graph as Human or AI")
     parser.add_argument("graph", help="path to the graph to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs', 'bidir', 'bidir_astar', 'alt', 'ch'],
                         help="the agent that will play the game")
+    parser.add_argument("--landmarks", "-l", type=int, default=8,
+                        help="the number of landmarks used by the 'alt' agent")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the graph with the streaming loader into the compact (CSR) graph (only for the agents: " + ', '.join(COMPACT_AGENTS) + ")")
 
     args = parser.parse_args()
     try:
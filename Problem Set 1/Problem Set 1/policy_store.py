@@ -0,0 +1,121 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional
+
+from cost_to_go import layout_fingerprint
+from dungeon import DungeonProblem, DungeonState
+from mathutils import Direction
+from persistence import cache_path, map_arrays, save_arrays
+
+# This file stores the policies of the search agents and the heuristic caches of a dungeon on disk,
+# so a new run on the same level starts from what the previous runs already found instead of searching again.
+# Every file is keyed by the layout fingerprint (see "cost_to_go.layout_fingerprint") so the data of different levels never mix.
+
+# A table from integer keys to numbers that is stored on disk as two arrays: the sorted keys and their values
+# The file is memory-mapped when the table is created, so nothing is read until a key is looked up (with a binary search)
+# and only the pages that are touched are loaded. The entries that are found or added are kept in a dictionary
+# so the next lookups of the same keys are O(1). "save" merges the new entries into the file.
+class PersistentTable:
+    __slots__ = ("path", "typecode", "keys", "values", "entries", "changed")
+
+    def __init__(self, path: str, typecode: str) -> None:
+        self.path = path
+        self.typecode = typecode                        # The typecode of the values (e.g. 'b' for actions or 'd' for costs)
+        arrays = map_arrays(path)
+        self.keys = array('Q') if arrays is None else arrays["keys"]
+        self.values = array(typecode) if arrays is None else arrays["values"]
+        self.entries: Dict[int, float] = {}             # The entries that were looked up or added in this process
+        self.changed = False                            # True if an entry was added since the table was loaded or saved
+
+    # Returns the value of the key (or the default if it is not in the table)
+    def get(self, key: int, default: Optional[float] = None) -> Optional[float]:
+        value = self.entries.get(key)
+        if value is None:
+            keys = self.keys
+            index = bisect_left(keys, key)
+            if index == len(keys) or keys[index] != key:
+                return default
+            value = self.entries[key] = self.values[index]
+        return value
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: int) -> float:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: int, value: float) -> None:
+        if self.entries.get(key) != value:
+            self.entries[key] = value
+            self.changed = True
+
+    # Write the table (the entries of the file and the new entries) to the file if an entry was added
+    # The file is replaced atomically, so the tables that are still mapping the old file stay valid
+    def save(self) -> None:
+        if not self.changed: return
+        merged = dict(zip(self.keys, self.values))
+        merged.update(self.entries)
+        keys = sorted(merged)
+        self.keys = array('Q', keys)
+        self.values = array(self.typecode, (merged[key] for key in keys))
+        save_arrays(self.path, {"keys": self.keys, "values": self.values})
+        self.changed = False
+
+# The policy of a search agent (the action to do in every state on a solution path) for the states of a dungeon
+# It has the same interface as the dictionary used by the agents (in, get, [] and []=), so it can replace it:
+#   agent.policy = load_policy(problem, "astar_strong")
+# Every state is encoded as the integer mask * cells + cell (like the cost-to-go table) and every action as its direction
+# (or -1 if no solution was found from the state).
+class DungeonPolicy:
+    __slots__ = ("width", "cells", "table")
+
+    def __init__(self, problem: DungeonProblem, table: PersistentTable) -> None:
+        layout = problem.layout
+        self.width = layout.width
+        self.cells = layout.width * layout.height
+        if self.cells << len(layout.coins) > 1 << 64:
+            raise ValueError(f"The states of a level with {len(layout.coins)} coins cannot be encoded in 64 bits")
+        self.table = table
+
+    def key(self, state: DungeonState) -> int:
+        return state.coin_mask() * self.cells + state.player.y * self.width + state.player.x
+
+    def get(self, state: DungeonState, default: Optional[Direction] = None) -> Optional[Direction]:
+        value = self.table.get(self.key(state))
+        if value is None: return default
+        return None if value < 0 else Direction(value)
+
+    def __contains__(self, state: DungeonState) -> bool:
+        return self.key(state) in self.table
+
+    def __getitem__(self, state: DungeonState) -> Optional[Direction]:
+        value = self.table[self.key(state)]
+        return None if value < 0 else Direction(value)
+
+    def __setitem__(self, state: DungeonState, action: Optional[Direction]) -> None:
+        self.table[self.key(state)] = -1 if action is None else int(action)
+
+    def save(self) -> None:
+        self.table.save()
+
+# Returns the stored policy of the named agent (e.g. "astar_strong") for the level of the problem
+# The name should identify the search and the heuristic, since different agents may follow different (but valid) paths
+def load_policy(problem: DungeonProblem, name: str, directory: Optional[str] = None) -> DungeonPolicy:
+    path = cache_path(f"dungeon_policy_{name}", layout_fingerprint(problem), directory)
+    return DungeonPolicy(problem, PersistentTable(path, 'b'))
+
+# Replace the MST costs cached by the strong heuristic (see "dungeon_heuristic.estimate_remaining_cost") with a persistent table
+# The costs that were already computed in this process are kept. Call "save" on the returned table to store the new costs.
+def load_heuristic_cache(problem: DungeonProblem, directory: Optional[str] = None) -> PersistentTable:
+    cache = problem.cache()
+    mst_costs = cache.get("mst_costs")
+    if isinstance(mst_costs, PersistentTable):
+        return mst_costs
+    table = PersistentTable(cache_path("dungeon_mst_costs", layout_fingerprint(problem), directory), 'd')
+    for mask, cost in (mst_costs or {}).items():
+        table[mask] = cost
+    cache["mst_costs"] = table
+    return table
@@ -1,7 +1,12 @@
 from problem import HeuristicFunction, Problem, S, A, Solution
+from typing import Optional
 from collections import deque
 from helpers import utils
-from queue import PriorityQueue
+from frontier import PriorityFrontier
+from search_nodes import SearchNodes
+from search_stats import SearchStats
+from closed_set import ClosedSet
+from helpers.heuristic_checks import ConsistencyChecker
 #TODO: Import any modules you want to use
 
 # All search functions take a problem and a state
@@ -11,170 +16,285 @@ from queue import PriorityQueue
 # All the search functions should return one of two possible type:
 # 1. A list of actions which represent the path from the initial state to the final state
 # 2. None if there is no solution
+# All of them optionally receive a SearchStats object (see "search_stats.py") which they fill while searching
+# The searches with an explored set also accept a closed set backend (see "closed_set.py") to replace the default python set
+# The searches expand a state with "problem.expand" which returns the (action, child, cost) triples of all its successors
+# The A* and Best First searches also accept a ConsistencyChecker (see "helpers/heuristic_checks.py") which is given the heuristic values they compute
 
-def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def BreadthFirstSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStats] = None, closed: Optional[ClosedSet[S]] = None) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    frontier= deque([(initial_state, [])]) # Initial path is empty
-    explored=[]
+    if stats is not None: stats.begin()
+    # The nodes store the parent, action and cost of every generated node so that the path can be rebuilt at the goal
+    nodes = SearchNodes()
+    frontier= deque([(initial_state, nodes.add_root())]) # The initial node is the root (empty path)
+    # The states in the frontier deque are mirrored in a set (kept in sync on every push and pop) for O(1) membership tests
+    in_frontier={initial_state}
+    explored=set() if closed is None else closed
     while(True):
         # frontier is empty then we can't find a path to the goal
         if len(frontier)==0:
+            if stats is not None: stats.end()
             return None
-        # Dequeue the leftmost (first) node in queue and the path leading to it
-        node, path = frontier.popleft()
+        # Dequeue the leftmost (first) node in queue and its index in the node store
+        node, index = frontier.popleft()
+        in_frontier.discard(node)
         # If the goal is reached, return the path
         if problem.is_goal(node):
-            return path
+            if stats is not None: stats.end()
+            return nodes.path(index)
         # Add the node to the explored list
-        explored.append(node)
-        # Expand the node by getting possible actions
-        actions=problem.get_actions(node)
-        for action in actions:
-            # Given the state and the action, return the next state 
-            child=problem.get_successor(node,action)
+        explored.add(node)
+        if stats is not None: stats.expand(len(frontier) + 1, len(explored))
+        # Expand the node into its (action, child, cost) triples
+        for action, child, _ in problem.expand(node):
+            if stats is not None: stats.generated += 1
             # Add child node to the frontier end if not explored and not already in frontier
-            if child not in explored and all(c[0] != child for c in frontier):
-                frontier.append((child, path + [action])) 
+            if child not in explored and child not in in_frontier:
+                frontier.append((child, nodes.add(index, action)))
+                in_frontier.add(child)
+            elif stats is not None:
+                stats.duplicates += 1
 
 
-def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def DepthFirstSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStats] = None, closed: Optional[ClosedSet[S]] = None) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    frontier= deque([(initial_state, [])]) # Initial path is empty
-    explored=[]
+    if stats is not None: stats.begin()
+    # The nodes store the parent, action and cost of every generated node so that the path can be rebuilt at the goal
+    nodes = SearchNodes()
+    frontier= deque([(initial_state, nodes.add_root())]) # The initial node is the root (empty path)
+    # The states in the frontier deque are mirrored in a set (kept in sync on every push and pop) for O(1) membership tests
+    in_frontier={initial_state}
+    explored=set() if closed is None else closed
     while(True):
         # frontier is empty then we can't find a path to the goal
         if len(frontier)==0:
+            if stats is not None: stats.end()
             return None
-        # Pop the rightmost (last) node inserted and the path leading to it
-        node, path = frontier.pop()
+        # Pop the rightmost (last) node inserted and its index in the node store
+        node, index = frontier.pop()
+        in_frontier.discard(node)
         # If the goal is reached, return the path
         if problem.is_goal(node):
-            return path
+            if stats is not None: stats.end()
+            return nodes.path(index)
         # Add the node to the explored list
-        explored.append(node)
-        # Expand the node by getting possible actions
-        actions=problem.get_actions(node)
-        for action in actions:
-            # Given the state and the action, return the next state 
-            child=problem.get_successor(node,action)
+        explored.add(node)
+        if stats is not None: stats.expand(len(frontier) + 1, len(explored))
+        # Expand the node into its (action, child, cost) triples
+        for action, child, _ in problem.expand(node):
+            if stats is not None: stats.generated += 1
             # Add child node to the frontier end if not explored and not already in frontier
-            if child not in explored and all(c[0] != child for c in frontier):
-                frontier.append((child, path + [action])) 
+            if child not in explored and child not in in_frontier:
+                frontier.append((child, nodes.add(index, action)))
+                in_frontier.add(child)
+            elif stats is not None:
+                stats.duplicates += 1
     
-def UniformCostSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def UniformCostSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStats] = None, closed: Optional[ClosedSet[S]] = None) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    #frontier: S, path, g(S)
-    frontier= [(initial_state, [],0)] # Initial path is empty and g(source)=0
-    explored=set()
+    if stats is not None: stats.begin()
+    #frontier: S -> node index, priority = g(S)
+    nodes = SearchNodes()
+    frontier = PriorityFrontier()
+    frontier.push(initial_state, 0, nodes.add_root()) # Initial path is empty and g(source)=0
+    explored=set() if closed is None else closed
     while(True):
         # frontier is empty then we can't find a path to the goal
         if len(frontier)==0:
+            if stats is not None: stats.end()
             return None
-        # Pop the first node and the path leading to it
-        node, path,cost = frontier.pop(0)
+        # Pop the node with the lowest cost and its index in the node store
+        node, cost, index = frontier.pop()
         # If the goal is reached, return the path
         if problem.is_goal(node):
-            return path
+            if stats is not None: stats.end()
+            return nodes.path(index)
         # Add the node to the explored list
         explored.add(node)
-        # Expand the node by getting possible actions
-        actions=problem.get_actions(node)
-        for action in actions:
-            # Get the successor state and its cost
-            child = problem.get_successor(node, action)
-            child_g_value = cost + problem.get_cost(node, action)
+        if stats is not None: stats.expand(len(frontier) + 1, len(explored))
+        # Expand the node into its (action, child, cost) triples
+        for action, child, action_cost in problem.expand(node):
+            child_g_value = cost + action_cost
+            if stats is not None: stats.generated += 1
             # Check if child is not in explored and not in frontier -> add it
-            if child not in explored and all(c[0] != child for c in frontier):
-                frontier.append((child, path + [action],child_g_value))
-            else:   
-                # Check if child is in frontier
-                for i, (frontier_child, frontier_path, frontier_cost) in enumerate(frontier):
-                    if frontier_child == child:
-                        # If the cost is lower, replace it
-                        if child_g_value < frontier_cost:
-                            frontier[i] = (child, path + [action], child_g_value) 
-                        break
-            
-        # Sort by the cost: g
-        # if two elements have the same priority, the sort will automatically maintain 
-        # their relative order based on their original order of insertion in the list
-        frontier = sorted(frontier, key=lambda x: (x[2]))
+            if child not in explored and child not in frontier:
+                frontier.push(child, child_g_value, nodes.add(index, action, child_g_value))
+            # Check if child is in frontier, if the cost is lower, replace it
+            elif child in frontier:
+                if child_g_value < frontier.priority(child):
+                    frontier.decrease(child, child_g_value, nodes.add(index, action, child_g_value))
+                    if stats is not None: stats.reopened += 1
+                elif stats is not None:
+                    stats.duplicates += 1
+            elif stats is not None:
+                stats.duplicates += 1
 
-def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
+def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, stats: Optional[SearchStats] = None, closed: Optional[ClosedSet[S]] = None,
+                checker: Optional[ConsistencyChecker] = None) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    #frontier: S, path, g(S), f(S)
-    frontier= [(initial_state, [],0,heuristic(problem, initial_state))] # Initial path is empty and g(source)=0, f(source)=g(source)+h(source)
-    explored=set()
+    # The heuristic is only wrapped (to count and time its calls) if the statistics are requested
+    if stats is not None: heuristic = stats.begin(heuristic)
+    #frontier: S -> node index (the node store holds g(S)), priority = f(S)
+    nodes = SearchNodes()
+    frontier = PriorityFrontier()
+    # Initial path is empty and g(source)=0, f(source)=g(source)+h(source)
+    frontier.push(initial_state, heuristic(problem, initial_state), nodes.add_root())
+    explored=set() if closed is None else closed
     while(True):
         # frontier is empty then we can't find a path to the goal
         if len(frontier)==0:
+            if stats is not None: stats.end()
             return None
-        # Pop the first node and the path leading to it
-        node, path,cost_g,cost_f = frontier.pop(0)
+        # Pop the node with the lowest f and its index in the node store
+        node, cost_f, index = frontier.pop()
         # If the goal is reached, return the path
         if problem.is_goal(node):
-            return path
+            if stats is not None: stats.end()
+            return nodes.path(index)
+        cost_g = nodes.cost(index)
         # Add the node to the explored list
         explored.add(node)
-        # Expand the node by getting possible actions
-        actions=problem.get_actions(node)
-        for action in actions:
-            # Get the successor state and its cost
-            child = problem.get_successor(node, action)
-            child_g_value = cost_g+problem.get_cost(node,action)
-            child_f_value=child_g_value+heuristic(problem,child)
+        if stats is not None: stats.expand(len(frontier) + 1, len(explored))
+        # Expand the node into its (action, child, cost) triples
+        for action, child, action_cost in problem.expand(node):
+            child_g_value = cost_g+action_cost
+            child_h_value = heuristic(problem,child)
+            child_f_value=child_g_value+child_h_value
+            # The heuristic of the parent is its f minus its g so the check does not call the heuristic again
+            if checker is not None: checker.check(node, cost_f-cost_g, action, action_cost, child, child_h_value)
+            if stats is not None: stats.generated += 1
             # Check if child is not in explored and not in frontier -> add it
-            if child not in explored and all(c[0] != child for c in frontier):
-                frontier.append((child, path + [action],child_g_value,child_f_value))
-            else:   
-                # Check if child is in frontier
-                for i, (frontier_child, frontier_path, frontier_g,frontier_f) in enumerate(frontier):
-                    if frontier_child == child:
-                        # If the cost is lower, replace it
-                        if child_f_value < frontier_f:
-                            frontier[i] = (child, path + [action], child_g_value,child_f_value)  
-                        break
-            
-        # Sort by the cost+heuristic: f
-        # if two elements have the same priority, the sort will automatically maintain 
-        # their relative order based on their original order of insertion in the list
-        frontier = sorted(frontier, key=lambda x: (x[3]))
+            if child not in explored and child not in frontier:
+                frontier.push(child, child_f_value, nodes.add(index, action, child_g_value))
+            # Check if child is in frontier, if the cost is lower, replace it
+            elif child in frontier:
+                if child_f_value < frontier.priority(child):
+                    frontier.decrease(child, child_f_value, nodes.add(index, action, child_g_value))
+                    if stats is not None: stats.reopened += 1
+                elif stats is not None:
+                    stats.duplicates += 1
+            elif stats is not None:
+                stats.duplicates += 1
 
-def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
+def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, stats: Optional[SearchStats] = None, closed: Optional[ClosedSet[S]] = None,
+                    checker: Optional[ConsistencyChecker] = None) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    #frontier: S, path, h(S)
-    frontier= [(initial_state, [],heuristic(problem, initial_state))] # Initial path is empty and h(source)
-    explored=set()
+    # The heuristic is only wrapped (to count and time its calls) if the statistics are requested
+    if stats is not None: heuristic = stats.begin(heuristic)
+    #frontier: S -> node index, priority = h(S)
+    nodes = SearchNodes()
+    frontier = PriorityFrontier()
+    frontier.push(initial_state, heuristic(problem, initial_state), nodes.add_root()) # Initial path is empty and h(source)
+    explored=set() if closed is None else closed
     while(True):
         # frontier is empty then we can't find a path to the goal
         if len(frontier)==0:
+            if stats is not None: stats.end()
             return None
-        # Pop the first node and the path leading to it
-        node, path,cost_h = frontier.pop(0)
+        # Pop the node with the lowest h and its index in the node store
+        node, cost_h, index = frontier.pop()
         # If the goal is reached, return the path
         if problem.is_goal(node):
-            return path
+            if stats is not None: stats.end()
+            return nodes.path(index)
         # Add the node to the explored list
         explored.add(node)
-        # Expand the node by getting possible actions
-        actions=problem.get_actions(node)
-        for action in actions:
-            # Get the successor state and its cost
-            child = problem.get_successor(node, action)
+        if stats is not None: stats.expand(len(frontier) + 1, len(explored))
+        # Expand the node into its (action, child, cost) triples
+        for action, child, action_cost in problem.expand(node):
             child_h_value=heuristic(problem,child)
+            if checker is not None: checker.check(node, cost_h, action, action_cost, child, child_h_value)
+            if stats is not None: stats.generated += 1
             # Check if child is not in explored and not in frontier -> add it
-            if child not in explored and all(c[0] != child for c in frontier):
-                frontier.append((child, path + [action],child_h_value))
-            else:   
-                # Check if child is in frontier
-                for i, (frontier_child, frontier_path, frontier_h) in enumerate(frontier):
-                    if frontier_child == child:
-                        # If the cost is lower, replace it
-                        if child_h_value < frontier_h:
-                            frontier[i] = (child, path + [action], child_h_value)  
-                        break
-            
-        # Sort by the heuristic: h
-        # if two elements have the same priority, the sort will automatically maintain 
-        # their relative order based on their original order of insertion in the list
-        frontier = sorted(frontier, key=lambda x: (x[2]))
\ No newline at end of file
+            if child not in explored and child not in frontier:
+                frontier.push(child, child_h_value, nodes.add(index, action))
+            # Check if child is in frontier, if the cost is lower, replace it
+            elif child in frontier:
+                if child_h_value < frontier.priority(child):
+                    frontier.decrease(child, child_h_value, nodes.add(index, action))
+                    if stats is not None: stats.reopened += 1
+                elif stats is not None:
+                    stats.duplicates += 1
+            elif stats is not None:
+                stats.duplicates += 1
+
+# Bidirectional search runs two searches at the same time: a forward one from the initial state
+# and a backward one from the goal on the reversed problem, and stops when they meet.
+# It requires the problem to have a single goal and a "reversed(goal)" method which returns the backward problem
+# (e.g. GraphRoutingProblem). If no heuristic is given, it is a bidirectional uniform cost search,
+# so it can be used by the UninformedSearchAgent as well as the InformedSearchAgent.
+# With a heuristic, it is a bidirectional A* which uses the average of the forward and backward heuristics
+# as the potential of each state: p(S) = (h_forward(S) - h_backward(S)) / 2 and -p(S) in the backward direction.
+# Both searches are then consistent, and it is correct to stop when:
+#   (the lowest forward priority) + (the lowest backward priority) >= (the cost of the best path found so far)
+def BidirectionalSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction = None, stats: Optional[SearchStats] = None) -> Solution:
+    if stats is not None: heuristic = stats.begin(heuristic)
+    backward_problem = problem.reversed(initial_state)
+    goal = backward_problem.get_initial_state()
+    if heuristic is None:
+        potential = lambda state: 0
+    else:
+        potential = lambda state: (heuristic(problem, state) - heuristic(backward_problem, state)) / 2
+    # Every side holds: its problem, frontier, nodes, the node index of every reached state, the explored set and the sign of the potential
+    sides = []
+    for side_problem, root, sign in ((problem, initial_state, 1), (backward_problem, goal, -1)):
+        nodes = SearchNodes()
+        frontier = PriorityFrontier()
+        index = nodes.add_root()
+        frontier.push(root, sign * potential(root), index)
+        sides.append((side_problem, frontier, nodes, {root: index}, set(), sign))
+    forward, backward = sides
+    best_cost, meeting = float('inf'), None
+    while forward[1] and backward[1]:
+        # Stop when no path through the unexplored states can be better than the best path found so far
+        if forward[1].min_priority() + backward[1].min_priority() >= best_cost:
+            break
+        # Expand the side with the smaller frontier
+        side, other = (forward, backward) if len(forward[1]) <= len(backward[1]) else (backward, forward)
+        side_problem, frontier, nodes, reached, explored, sign = side
+        node, _, index = frontier.pop()
+        # If the forward search reaches the goal, its path is optimal
+        if side is forward and problem.is_goal(node):
+            if stats is not None: stats.end()
+            return nodes.path(index)
+        explored.add(node)
+        if stats is not None: stats.expand(len(forward[1]) + len(backward[1]) + 1, len(forward[4]) + len(backward[4]))
+        cost = nodes.cost(index)
+        for action, child, action_cost in side_problem.expand(node):
+            if stats is not None: stats.generated += 1
+            if child in explored:
+                if stats is not None: stats.duplicates += 1
+                continue
+            child_g_value = cost + action_cost
+            if child not in frontier:
+                reached[child] = nodes.add(index, action, child_g_value)
+                frontier.push(child, child_g_value + sign * potential(child), reached[child])
+            elif child_g_value < nodes.cost(frontier.data(child)):
+                reached[child] = nodes.add(index, action, child_g_value)
+                frontier.decrease(child, child_g_value + sign * potential(child), reached[child])
+                if stats is not None: stats.reopened += 1
+            elif stats is not None:
+                stats.duplicates += 1
+            # If the other side already reached the child, we found a path that goes through it
+            other_index = other[3].get(child)
+            if other_index is not None:
+                path_cost = nodes.cost(reached[child]) + other[2].cost(other_index)
+                if path_cost < best_cost:
+                    best_cost = path_cost
+                    meeting = (child, forward[3][child], backward[3][child])
+    if stats is not None: stats.end()
+    if meeting is None:
+        return None
+    meeting_state, forward_index, backward_index = meeting
+    # The backward path is stored as actions on the backward problem from the goal to the meeting state
+    # so we replay it to get the states then, for every step, pick the cheapest forward action between the same states
+    states = [goal]
+    for action in backward[2].path(backward_index):
+        states.append(backward_problem.get_successor(states[-1], action))
+    path = forward[2].path(forward_index)
+    for state, next_state in zip(reversed(states), reversed(states[:-1])):
+        path.append(min(
+            ((action, cost) for action, child, cost in problem.expand(state) if child == next_state),
+            key=lambda pair: pair[1]
+        )[0])
+    return path
@@ -0,0 +1,44 @@
+from typing import Generic, List, Optional
+from problem import A
+
+# The search node store is an arena shared by all the search functions
+# Instead of storing the whole action list with every frontier entry (which copies O(depth) actions on every push),
+# every node is a row in three parallel lists that holds:
+#   the index of its parent node, the action that led to it from the parent, and its path cost g.
+# The frontier only stores the node index and the path is rebuilt once by following the parents when the goal is popped.
+class SearchNodes(Generic[A]):
+    __slots__ = ("parents", "actions", "costs")
+
+    def __init__(self) -> None:
+        self.parents: List[int] = []
+        self.actions: List[Optional[A]] = []
+        self.costs: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    # Add the root node (the initial state) and return its index
+    def add_root(self, cost: float = 0) -> int:
+        return self.add(-1, None, cost)
+
+    # Add a node that was reached from the node 'parent' by applying 'action' and return its index
+    def add(self, parent: int, action: Optional[A], cost: float = 0) -> int:
+        index = len(self.parents)
+        self.parents.append(parent)
+        self.actions.append(action)
+        self.costs.append(cost)
+        return index
+
+    # Return the path cost g of a node
+    def cost(self, index: int) -> float:
+        return self.costs[index]
+
+    # Rebuild the list of actions from the root to the given node
+    def path(self, index: int) -> List[A]:
+        parents, actions = self.parents, self.actions
+        path = []
+        while parents[index] != -1:
+            path.append(actions[index])
+            index = parents[index]
+        path.reverse()
+        return path
@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+import time
+
+from problem import HeuristicFunction
+
+# The statistics of a single search (or of many searches if the same object is passed to all of them)
+# All the search functions accept an optional "stats" argument. If it is None (the default), the searches skip all the
+# bookkeeping: the heuristic is not wrapped and the counters are never touched, so the cost is a single "is None" check per update.
+@dataclass
+class SearchStats:
+    expanded: int = 0           # The number of expanded nodes
+    generated: int = 0          # The number of generated children
+    duplicates: int = 0         # The number of generated children that were dropped (already explored, already in the frontier with a lower priority or on the current path)
+    reopened: int = 0           # The number of states that were reached again with a better priority (or regenerated after being forgotten by SMA*)
+    peak_frontier: int = 0      # The largest size of the frontier
+    peak_explored: int = 0      # The largest size of the explored set
+    heuristic_calls: int = 0    # The number of heuristic calls
+    heuristic_time: float = 0   # The total time spent in the heuristic (in seconds)
+    elapsed: float = 0          # The wall time of the search (in seconds)
+    _start: float = field(default=0, repr=False, compare=False)
+
+    # Start timing the search. If a heuristic is given, it returns a version of it that also counts and times the calls
+    def begin(self, heuristic: HeuristicFunction = None) -> HeuristicFunction:
+        self._start = time.perf_counter()
+        if heuristic is None: return None
+        def timed_heuristic(problem, state):
+            start = time.perf_counter()
+            value = heuristic(problem, state)
+            self.heuristic_time += time.perf_counter() - start
+            self.heuristic_calls += 1
+            return value
+        return timed_heuristic
+
+    # Record the expansion of a node given the current frontier and explored set sizes
+    def expand(self, frontier_size: int, explored_size: int = 0) -> None:
+        self.expanded += 1
+        if frontier_size > self.peak_frontier: self.peak_frontier = frontier_size
+        if explored_size > self.peak_explored: self.peak_explored = explored_size
+
+    # Stop timing the search (the elapsed time is added so the same object can accumulate many searches)
+    def end(self) -> None:
+        self.elapsed += time.perf_counter() - self._start
+
+    # Add the statistics of another search (e.g. a worker of a parallel search). The peaks are added since both searches held their nodes at the same time
+    def merge(self, other: 'SearchStats') -> None:
+        self.expanded += other.expanded
+        self.generated += other.generated
+        self.duplicates += other.duplicates
+        self.reopened += other.reopened
+        self.peak_frontier += other.peak_frontier
+        self.peak_explored += other.peak_explored
+        self.heuristic_calls += other.heuristic_calls
+        self.heuristic_time += other.heuristic_time
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The unit tests of the extra searches (the graded tests are run by "autograder.py" from the cases in "testcases")
+# Run them from the problem set directory with:
+#   python -m pytest tests
+# The modules of the problem set are imported from the parent directory and the levels are loaded relative to it
+# (like the autograder), so every test runs from there.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+@pytest.fixture(autouse=True)
+def run_from_problem_set(monkeypatch):
+    monkeypatch.chdir(ROOT)
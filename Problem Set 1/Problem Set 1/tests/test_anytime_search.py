@@ -0,0 +1,87 @@
+from typing import Dict, List, Tuple
+
+from agents import InformedSearchAgent
+from anytime_search import AnytimeRepairingAStarSearch
+from dungeon import DungeonProblem
+from dungeon_heuristic import strong_heuristic, weak_heuristic
+from graph import GraphRoutingProblem, graphrouting_heuristic
+from problem import Problem
+from search import UniformCostSearch
+
+# The tests of the anytime search: the path yielded by every iteration must have the yielded cost and respect the yielded bound
+# Run them with "python -m pytest tests" from the problem set directory (see "conftest.py")
+
+# A small weighted graph where the states and the actions are the node names
+class WeightedGraphProblem(Problem[str, str]):
+    def __init__(self, edges: Dict[str, List[Tuple[str, float]]], start: str, goal: str) -> None:
+        super().__init__()
+        self.edges = edges
+        self.start = start
+        self.goal = goal
+
+    def get_initial_state(self) -> str:
+        return self.start
+
+    def is_goal(self, state: str) -> bool:
+        return state == self.goal
+
+    def get_actions(self, state: str) -> List[str]:
+        return [node for node, _ in self.edges.get(state, [])]
+
+    def get_successor(self, state: str, action: str) -> str:
+        return action
+
+    def get_cost(self, state: str, action: str) -> float:
+        return dict(self.edges[state])[action]
+
+def path_cost(problem: Problem, solution: List) -> float:
+    state, cost = problem.get_initial_state(), 0
+    for action in solution:
+        cost += problem.get_cost(state, action)
+        state = problem.get_successor(state, action)
+    assert problem.is_goal(state)
+    return cost
+
+# The bounds are only checked for admissible heuristics
+def check_iterations(problem: Problem, heuristic, weights=(5, 3, 2, 1.5, 1.25, 1), admissible: bool = True) -> List[Tuple[List, float, float]]:
+    optimal = UniformCostSearch(problem, problem.get_initial_state())
+    iterations = list(AnytimeRepairingAStarSearch(problem, problem.get_initial_state(), heuristic, weights))
+    # If there is no solution, nothing is yielded
+    if optimal is None:
+        assert not iterations
+        return iterations
+    optimal_cost = path_cost(problem, optimal)
+    assert iterations
+    for solution, cost, bound in iterations:
+        assert abs(path_cost(problem, solution) - cost) < 1e-9
+        if admissible: assert cost <= bound * optimal_cost + 1e-9
+    return iterations
+
+# The goal is found through the expensive edge with the weight 5, then the last iteration finds the cheap path to the goal
+# through A, but the goal is not popped again since its heuristic is not 0. The cost of the goal must follow its new path.
+def test_relaxed_goal_updates_the_cost():
+    edges = {"S": [("G", 10), ("A", 1)], "A": [("G", 5)]}
+    h = {"S": 0, "A": 8, "G": 5}
+    problem = WeightedGraphProblem(edges, "S", "G")
+    iterations = check_iterations(problem, lambda _, state: h[state], weights=(5, 1), admissible=False)
+    solution, cost, _ = iterations[-1]
+    assert solution == ["A", "G"] and cost == 6
+
+def test_dungeons():
+    for level in ("dungeons/dungeon1.txt", "dungeons/dungeon2.txt", "dungeons/dungeon3.txt"):
+        problem = DungeonProblem.from_file(level)
+        for heuristic in (weak_heuristic, strong_heuristic):
+            check_iterations(problem, heuristic)
+
+def test_graphs():
+    for level in ("graphs/graph1.json", "graphs/graph2.json", "graphs/graph3.json", "graphs/graph4.json"):
+        check_iterations(GraphRoutingProblem.from_file(level), graphrouting_heuristic)
+
+# A search that fails (e.g. when the deadline passes) is not stored in the policy of an agent with "cache_failures=False"
+def test_failures_are_searched_again():
+    problem = WeightedGraphProblem({"S": [("G", 1)]}, "S", "G")
+    results = [None, ["G"]]
+    agent = InformedSearchAgent(lambda problem, state, heuristic: results.pop(0), lambda _, state: 0, cache_failures=False)
+    assert agent.act(problem, "S") is None
+    assert agent.act(problem, "S") == "G"
+    assert not results
@@ -0,0 +1,29 @@
+import pytest
+
+from agents import BatchSearchAgent
+from compact_dungeon import CompactDungeonProblem
+from graph import GraphRoutingProblem
+from search import UniformCostSearch
+
+# The tests of the batch search agent
+# Run them with "python -m pytest tests" from the problem set directory (see "conftest.py")
+
+# The process pool gives the same solutions as the searches in this process, for many start states and for many goals
+def test_pool_matches_serial():
+    problem = GraphRoutingProblem.from_file("graphs/graph2.json")
+    nodes = list(problem.adjacency)
+    serial = BatchSearchAgent(UniformCostSearch)
+    pooled = BatchSearchAgent(UniformCostSearch, workers=2)
+    assert pooled.solve(problem, nodes).costs == serial.solve(problem, nodes).costs
+    assert pooled.solve_goals(problem, nodes).costs == serial.solve_goals(problem, nodes).costs
+
+# A problem without "with_goal" is rejected before any search (instead of failing in the worker processes)
+def test_goals_need_with_goal():
+    problem = CompactDungeonProblem.from_file("dungeons/dungeon1.txt")
+    for workers in (0, 2):
+        with pytest.raises(ValueError, match="with_goal"):
+            BatchSearchAgent(UniformCostSearch, workers=workers).solve_goals(problem, [problem.exit, 0])
+    # The start states are still solved in the pool
+    starts = [problem.get_initial_state()] + [child for _, child, _ in problem.expand(problem.get_initial_state())]
+    result = BatchSearchAgent(UniformCostSearch, workers=2).solve(problem, starts)
+    assert result.stats.unsolved == 0 and result.costs == BatchSearchAgent(UniformCostSearch).solve(problem, starts).costs
@@ -0,0 +1,50 @@
+from typing import List
+
+from compact_graph import CompactGraphRoutingProblem, compact_graphrouting_heuristic
+from graph import GraphRoutingProblem, graphrouting_heuristic
+from problem import Problem
+from search import AStarSearch, BreadthFirstSearch, UniformCostSearch
+
+# The tests of the compact (CSR) graph: it must give the same results as the GraphRoutingProblem built from the same file
+# Run them with "python -m pytest tests" from the problem set directory (see "conftest.py")
+
+GRAPHS = ("graphs/graph1.json", "graphs/graph2.json", "graphs/graph3.json", "graphs/graph4.json")
+
+def path_cost(problem: Problem, solution: List) -> float:
+    state, cost = problem.get_initial_state(), 0
+    for action in solution:
+        cost += problem.get_cost(state, action)
+        state = problem.get_successor(state, action)
+    assert problem.is_goal(state)
+    return cost
+
+def test_same_path_costs():
+    for path in GRAPHS:
+        problem = GraphRoutingProblem.from_file(path)
+        # A small chunk size makes the streaming loader split the values between the chunks
+        compact = CompactGraphRoutingProblem.from_file(path, chunk_size=7)
+        searches = [
+            (lambda problem, state: UniformCostSearch(problem, state), UniformCostSearch),
+            (lambda problem, state: AStarSearch(problem, state, graphrouting_heuristic),
+             lambda problem, state: AStarSearch(problem, state, compact_graphrouting_heuristic)),
+        ]
+        for search, compact_search in searches:
+            solution = search(problem, problem.get_initial_state())
+            compact_solution = compact_search(compact, compact.get_initial_state())
+            if solution is None:
+                assert compact_solution is None
+                continue
+            # The positions are stored as float32, so the costs are compared with a tolerance
+            assert abs(path_cost(problem, solution) - path_cost(compact, compact_solution)) < 1e-4
+            assert compact.to_names(compact_solution) == [node.name for node in solution]
+
+def test_same_neighbors():
+    for path in GRAPHS:
+        problem = GraphRoutingProblem.from_file(path)
+        compact = CompactGraphRoutingProblem.from_file(path)
+        assert compact.to_names([compact.get_initial_state()]) == [problem.get_initial_state().name]
+        for node, neighbors in problem.adjacency.items():
+            assert compact.to_names(compact.get_actions(compact.graph.ids[node.name])) == [neighbor.name for neighbor in neighbors]
+        solution = BreadthFirstSearch(problem, problem.get_initial_state())
+        compact_solution = BreadthFirstSearch(compact, compact.get_initial_state())
+        assert (solution is None) == (compact_solution is None)
@@ -0,0 +1,30 @@
+from frontier import PriorityFrontier
+
+# The tests of the priority frontier
+# Run them with "python -m pytest tests" from the problem set directory (see "conftest.py")
+
+def pop_all(frontier: PriorityFrontier):
+    states = []
+    while frontier:
+        states.append(frontier.pop()[0])
+    return states
+
+# Equal priorities are popped in insertion order, and a decreased state keeps the order of its first insertion
+def test_ties_follow_the_insertion_order():
+    frontier = PriorityFrontier()
+    for state, priority in (("A", 5), ("B", 3), ("C", 3), ("D", 4)):
+        frontier.push(state, priority)
+    assert frontier.decrease("D", 3) and frontier.decrease("A", 3)
+    assert not frontier.decrease("B", 3)
+    assert pop_all(frontier) == ["A", "B", "C", "D"]
+
+# Decreasing the same state many times does not grow its key
+def test_repeated_decreases_keep_flat_keys():
+    frontier = PriorityFrontier()
+    frontier.push("A", 1000, "first")
+    for priority in range(999, 0, -1):
+        frontier.decrease("A", priority, priority)
+    frontier.push("B", 1)
+    assert frontier.priority("A") == 1 and frontier.data("A") == 1
+    assert all(len(entry[0]) == 2 for entry in frontier._heap)
+    assert pop_all(frontier) == ["A", "B"]
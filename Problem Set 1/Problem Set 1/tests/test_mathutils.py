@@ -0,0 +1,41 @@
+import pickle
+
+import pytest
+
+from mathutils import Direction, Point, get_point_grid
+
+# The tests of the Point class and of the shared points of the PointGrid
+# Run them with "python -m pytest tests" from the problem set directory (see "conftest.py")
+
+# A Point is a frozen dataclass: it is only equal to other points and it is not a sequence
+def test_point_is_not_a_tuple():
+    point = Point(1, 2)
+    assert point == Point(1, 2) and hash(point) == hash(Point(1, 2))
+    assert point != (1, 2)
+    with pytest.raises(TypeError): point < Point(2, 1)
+    with pytest.raises(TypeError): point * 2
+    with pytest.raises(TypeError): point[0]
+    with pytest.raises(AttributeError): point.x = 3
+
+def test_point_operators():
+    assert Point(1, 2) + Point(3, -1) == Point(4, 1)
+    assert Point(1, 2) - Point(3, -1) == Point(-2, 3)
+    assert -Point(1, 2) == Point(-1, -2)
+    assert str(Point(1, 2)) == "(1, 2)"
+    x, y = Point(1, 2)
+    assert (x, y) == (1, 2)
+    assert pickle.loads(pickle.dumps(Point(1, 2))) == Point(1, 2)
+
+# The grid points are ordinary points, so they can be mixed with the points created elsewhere
+def test_grid_points():
+    grid = get_point_grid(4, 3)
+    assert grid is get_point_grid(4, 3)
+    for y in range(3):
+        for x in range(4):
+            point = grid.point(x, y)
+            assert point == Point(x, y) and type(point) is Point
+            assert grid.intern(Point(x, y)) is point
+            for direction in Direction:
+                neighbor = point + direction.to_vector()
+                expected = grid.point(neighbor.x, neighbor.y) if 0 <= neighbor.x < 4 and 0 <= neighbor.y < 3 else None
+                assert grid.neighbor(point, direction) is expected
@@ -0,0 +1,65 @@
+import heapq
+import types
+from typing import Dict, List, Tuple
+
+import memory_bounded_search
+from dungeon import DungeonProblem
+from dungeon_heuristic import strong_heuristic
+from memory_bounded_search import COMPACT_FACTOR, SMAStarSearch
+from problem import Problem
+
+# The tests of SMA*: the heaps must stay within a constant factor of the memory budget (the stale entries are dropped)
+# and the search must end (with None) when the goal cannot be reached
+# Run them with "python -m pytest tests" from the problem set directory (see "conftest.py")
+
+# A small weighted graph where the states and the actions are the node names
+class WeightedGraphProblem(Problem[str, str]):
+    def __init__(self, edges: Dict[str, List[Tuple[str, float]]], start: str, goal: str) -> None:
+        super().__init__()
+        self.edges = edges
+        self.start = start
+        self.goal = goal
+
+    def get_initial_state(self) -> str:
+        return self.start
+
+    def is_goal(self, state: str) -> bool:
+        return state == self.goal
+
+    def get_actions(self, state: str) -> List[str]:
+        return [node for node, _ in self.edges.get(state, [])]
+
+    def get_successor(self, state: str, action: str) -> str:
+        return action
+
+    def get_cost(self, state: str, action: str) -> float:
+        return dict(self.edges[state])[action]
+
+# Replace the heap functions used by SMA* with ones that record the largest heap size
+def record_peak_heap(monkeypatch) -> List[int]:
+    peak = [0]
+    def heappush(heap, item):
+        heapq.heappush(heap, item)
+        peak[0] = max(peak[0], len(heap))
+    monkeypatch.setattr(memory_bounded_search, "heapq", types.SimpleNamespace(heappush=heappush, heappop=heapq.heappop, heapify=heapq.heapify))
+    return peak
+
+def test_heaps_stay_within_the_budget(monkeypatch):
+    peak = record_peak_heap(monkeypatch)
+    problem = DungeonProblem.from_file("dungeons/dungeon3.txt")
+    budget = 100
+    solution = SMAStarSearch(problem, problem.get_initial_state(), strong_heuristic, budget=budget)
+    assert solution is not None
+    state = problem.get_initial_state()
+    for action in solution:
+        state = problem.get_successor(state, action)
+    assert problem.is_goal(state)
+    # The heaps are compacted before every iteration, so only the entries pushed by one iteration can exceed the limit
+    assert peak[0] <= (COMPACT_FACTOR + 1) * (budget + 1)
+
+def test_unreachable_goal():
+    # The goal "G" has no incoming edges and the other nodes form cycles
+    edges = {"S": [("A", 1), ("B", 2)], "A": [("B", 1), ("S", 1)], "B": [("C", 3), ("A", 1)], "C": [("S", 1)], "G": []}
+    problem = WeightedGraphProblem(edges, "S", "G")
+    for budget in (3, 5, 8, 100):
+        assert SMAStarSearch(problem, "S", lambda _, state: 0, budget=budget) is None